@@ -0,0 +1,155 @@
+import numpy as np
+
+from estimator_engine import (PROJECT_FACTORS, VOLTAGE_FACTORS, REGION_FACTORS, DEFAULT_STUDIES, MEETINGS_COUNT,
+                              MEETINGS_HRS, MEETINGS_RATE, MODELLING_PERCENT, MODELLING_RATE, STUDY_CODES,
+                              STUDY_INDEX, TEAM_LEVELS, REPORT_PERCENT_MODE)
+
+# ============ BATCH ENGINE ============
+# Vectorized equivalent of calculateAll for many input sets at once. Inputs are
+# packed into arrays once, the per-estimate scale factor is computed once and
+# shared by every study, and totals are reduced across the study axis.
+
+# Catalog compiled into coefficient arrays, one slot per study code
+STUDY_BASE_HRS = np.array([DEFAULT_STUDIES[code]['baseHrs'] for code in STUDY_CODES], dtype=float)
+STUDY_COMPLEXITY = np.array([DEFAULT_STUDIES[code]['complexity'] for code in STUDY_CODES], dtype=float)
+
+def _lookup(table, keys):
+    return np.array([table.get(key, 1.0) for key in keys], dtype=float)
+
+def pack_inputs(inputs_list):
+    n = len(inputs_list)
+    
+    # Only selected studies are read from custom_studies; the rest keep catalog defaults
+    base_hrs = np.tile(STUDY_BASE_HRS, (n, 1))
+    complexity = np.tile(STUDY_COMPLEXITY, (n, 1))
+    selected = np.zeros((n, len(STUDY_CODES)))
+    selected_count = np.zeros(n)
+    rate = np.zeros((n, len(TEAM_LEVELS)))
+    allocation = np.zeros((n, len(TEAM_LEVELS)))
+    
+    for i, inputs in enumerate(inputs_list):
+        studies = inputs['custom_studies']
+        team = inputs['custom_team']
+        rate[i] = [team[level]['rate'] for level in TEAM_LEVELS]
+        allocation[i] = [team[level]['allocation'] for level in TEAM_LEVELS]
+        selected_count[i] = len(inputs['selected_studies'])
+        for code in inputs['selected_studies']:
+            if code in STUDY_INDEX:
+                j = STUDY_INDEX[code]
+                selected[i, j] += 1
+                base_hrs[i, j] = studies[code]['baseHrs']
+                complexity[i, j] = studies[code]['complexity']
+    
+    column = lambda field: np.array([inputs[field] for inputs in inputs_list], dtype=float)
+    return {
+        'facility_mw': column('facility_mw'),
+        'mv_buses': column('mv_buses'),
+        'lv_buses': column('lv_buses'),
+        'project_factor': _lookup(PROJECT_FACTORS, [inputs['project_type'] for inputs in inputs_list]),
+        'voltage_factor': _lookup(VOLTAGE_FACTORS, [inputs['voltage'] for inputs in inputs_list]),
+        'region_factor': _lookup(REGION_FACTORS, [inputs['region'] for inputs in inputs_list]),
+        'mw_exponent': column('mw_exponent'),
+        'bus_exponent': column('bus_exponent'),
+        'bus_confidence': column('bus_confidence'),
+        'buffer_percent': column('buffer_percent'),
+        'percent_mode': np.array([inputs['report_mode'] == REPORT_PERCENT_MODE for inputs in inputs_list]),
+        'report_percent': column('report_percent'),
+        'report_fixed': column('report_fixed'),
+        'report_complexity': column('report_complexity'),
+        'base_hrs': base_hrs,
+        'complexity': complexity,
+        'selected': selected,
+        'selected_count': selected_count,
+        'rate': rate,
+        'allocation': allocation
+    }
+
+def compute_factors(packed):
+    total_buses = packed['mv_buses'] + packed['lv_buses']
+    mw_factor = np.power(packed['facility_mw'] / 10, packed['mw_exponent'])
+    bus_factor = np.power(total_buses / 32, packed['bus_exponent'])
+    fixed_factor = (packed['project_factor'] * packed['voltage_factor'] *
+                    packed['region_factor'] * packed['bus_confidence'])
+    
+    # Same operation order as calculateAll to keep per-study hours within rounding of it
+    adjusted_hrs = packed['base_hrs'] * bus_factor[:, None] * mw_factor[:, None]
+    study_hrs = adjusted_hrs * (fixed_factor[:, None] * packed['complexity'])
+    
+    return {
+        'total_buses': total_buses,
+        'mw_factor': mw_factor,
+        'bus_factor': bus_factor,
+        'fixed_factor': fixed_factor,
+        'study_hrs': study_hrs,
+        'blended_rate': (packed['allocation'] * packed['rate']).sum(axis=1)
+    }
+
+def aggregate_batch(packed, factors):
+    total_buses = factors['total_buses']
+    blended_rate = factors['blended_rate']
+    study_hrs = factors['study_hrs'] * packed['selected']
+    report_pct = np.where(packed['percent_mode'], packed['report_percent'] / 100, 0.0)
+    report_hrs = study_hrs * report_pct[:, None]
+    study_cost = study_hrs * blended_rate[:, None]
+    report_cost = report_hrs * (blended_rate * packed['report_complexity'])[:, None]
+    
+    total_study_hours = study_hrs.sum(axis=1)
+    total_report_hours = report_hrs.sum(axis=1)
+    total_study_cost = study_cost.sum(axis=1)
+    total_reporting_cost = np.where(packed['percent_mode'],
+                                    total_report_hours * 1200 * packed['report_complexity'],
+                                    packed['report_fixed'] * (packed['selected_count'] / 7))
+    
+    total_project_hours = total_study_hours + total_report_hours + (MEETINGS_COUNT * MEETINGS_HRS)
+    meetings_cost = np.full(len(total_buses), MEETINGS_COUNT * MEETINGS_HRS * MEETINGS_RATE)
+    modelling_cost = total_project_hours * MODELLING_PERCENT * MODELLING_RATE
+    
+    subtotal = total_study_cost + total_reporting_cost + meetings_cost + modelling_cost
+    buffer = subtotal * (packed['buffer_percent'] / 100)
+    grand_total = subtotal + buffer
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mw_per_bus = packed['facility_mw'] / total_buses
+        cost_per_bus = np.where(total_buses > 0, grand_total / total_buses, 0.0)
+    
+    return {
+        'total_buses': total_buses,
+        'mw_per_bus': mw_per_bus,
+        'total_study_hours': total_study_hours,
+        'total_report_hours': total_report_hours,
+        'total_project_hours': total_project_hours,
+        'total_study_cost': total_study_cost,
+        'total_reporting_cost': total_reporting_cost,
+        'meetings_cost': meetings_cost,
+        'modelling_cost': modelling_cost,
+        'subtotal': subtotal,
+        'buffer': buffer,
+        'grand_total': grand_total,
+        'cost_per_bus': cost_per_bus,
+        'study_hrs': study_hrs,
+        'report_hrs': report_hrs,
+        'study_cost': study_cost,
+        'report_cost': report_cost
+    }
+
+def calculate_batch(inputs_list):
+    packed = pack_inputs(inputs_list)
+    return aggregate_batch(packed, compute_factors(packed))
+
+def batch_to_results(batch, i, selected_studies):
+    study_results = []
+    for code in selected_studies:
+        if code not in STUDY_INDEX:
+            continue
+        j = STUDY_INDEX[code]
+        study_results.append({
+            'name': DEFAULT_STUDIES[code]['name'],
+            'studyHrs': float(batch['study_hrs'][i, j]),
+            'reportHrs': float(batch['report_hrs'][i, j]),
+            'studyCost': float(batch['study_cost'][i, j]),
+            'reportCost': float(batch['report_cost'][i, j])
+        })
+    results = {key: float(value[i]) for key, value in batch.items() if value.ndim == 1}
+    results['total_buses'] = int(results['total_buses'])
+    results['study_results'] = study_results
+    return results
@@ -0,0 +1,177 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from estimator_engine import (PROJECT_FACTORS, VOLTAGE_FACTORS, REGION_FACTORS, DEFAULT_STUDIES, STUDY_CODES,
+                              STUDY_INDEX, TEAM_LEVELS, REPORT_PERCENT_MODE, COST_COMPONENTS, INPUT_FIELDS,
+                              default_inputs)
+from batch_engine import pack_inputs, compute_factors, aggregate_batch
+
+# ============ CHANGE ORDERS ============
+# A change order is a dict with any of:
+#   'delta':          {'lv_buses': 12, 'facility_mw': -2.5}   numeric increments
+#   'set':            {'region': 'MiddleEast', 'custom_team': {'L1': {'rate': 2600}}}
+#   'add_studies':    ['har']
+#   'remove_studies': ['ts']
+# Deltas are evaluated against the baseline's cached packed inputs and
+# factors; only the factor terms a change touches are recomputed.
+FACTOR_LOOKUPS = {'project_type': ('project_factor', PROJECT_FACTORS),
+                  'voltage': ('voltage_factor', VOLTAGE_FACTORS),
+                  'region': ('region_factor', REGION_FACTORS)}
+MW_FIELDS = {'facility_mw', 'mw_exponent'}
+BUS_FIELDS = {'mv_buses', 'lv_buses', 'bus_exponent'}
+FIXED_FIELDS = {'project_type', 'voltage', 'region', 'bus_confidence'}
+NESTED_FIELDS = {'custom_studies', 'custom_team', 'selected_studies'}
+STUDY_KEYS = {'baseHrs': 'base_hrs', 'complexity': 'complexity'}  # catalog key -> packed column
+TEAM_KEYS = {'rate': 'rate', 'allocation': 'allocation'}
+TEAM_INDEX = {level: t for t, level in enumerate(TEAM_LEVELS)}
+
+def make_baseline(inputs):
+    inputs = dict(default_inputs(), **inputs)
+    packed = pack_inputs([inputs])
+    factors = compute_factors(packed)
+    return {'inputs': inputs, 'packed': packed, 'factors': factors, 'results': aggregate_batch(packed, factors)}
+
+def load_baseline(source):
+    # Accepts an inputs dict, or a JSON export with its 'inputs' section
+    if isinstance(source, str):
+        with open(source, encoding='utf-8') as f:
+            source = json.load(f)
+    inputs = source.get('inputs', source)
+    if not isinstance(inputs, dict) or not set(INPUT_FIELDS) <= set(inputs):
+        raise ValueError("Baseline has no inputs section; re-export it from the current version of the estimator")
+    return make_baseline(inputs)
+
+def change_between(baseline_inputs, inputs):
+    # Only the study and level values that differ are carried, so unchanged
+    # studies and levels are not counted as touched
+    before, after = baseline_inputs['selected_studies'], inputs['selected_studies']
+    changes = {field: value for field, value in inputs.items()
+               if field not in NESTED_FIELDS and value != baseline_inputs.get(field)}
+    base_studies, base_team = baseline_inputs['custom_studies'], baseline_inputs['custom_team']
+    studies = {}
+    for code in after:
+        study, base = inputs['custom_studies'][code], base_studies.get(code, DEFAULT_STUDIES[code])
+        if study != base:
+            edited = {key: study[key] for key in STUDY_KEYS if key in study and study[key] != base.get(key)}
+            if edited:
+                studies[code] = edited
+    team = {}
+    for level in TEAM_LEVELS:
+        level_team, base = inputs['custom_team'][level], base_team[level]
+        if level_team != base:
+            team[level] = {key: value for key, value in level_team.items() if value != base.get(key)}
+    if studies:
+        changes['custom_studies'] = studies
+    if team:
+        changes['custom_team'] = team
+    return {
+        'set': changes,
+        'add_studies': [code for code in after if code not in before],
+        'remove_studies': [code for code in before if code not in after]
+    }
+
+def _apply(baseline, changes):
+    # Changes are gathered column by column, so each packed field (and each
+    # study or level column of the per-study and per-level fields) is written
+    # with one vectorized assignment instead of row by row
+    n = len(changes)
+    packed = {key: np.repeat(value, n, axis=0) for key, value in baseline['packed'].items()}
+    base_inputs = baseline['inputs']
+    fields_list = []
+    for change in changes:
+        fields = change.get('set', {})
+        if 'delta' in change:
+            fields = dict(fields, **{field: base_inputs[field] + delta for field, delta in change['delta'].items()})
+        fields_list.append(fields)
+    
+    present = {}
+    for field in set().union(*fields_list) - NESTED_FIELDS:
+        rows = np.array([field in fields for fields in fields_list], dtype=bool)
+        present[field] = rows
+        if field in FACTOR_LOOKUPS:
+            key, table = FACTOR_LOOKUPS[field]
+            values = [table.get(fields[field], 1.0) for fields in fields_list if field in fields]
+        elif field == 'report_mode':
+            key, values = 'percent_mode', [fields[field] == REPORT_PERCENT_MODE for fields in fields_list
+                                           if field in fields]
+        else:
+            key, values = field, [fields[field] for fields in fields_list if field in fields]
+        packed[key][rows] = values
+    
+    # Unselected studies keep the baseline's edited hours, so adding one only
+    # switches it on; a same-change edit is written over it below
+    empty = {}
+    base_studies = base_inputs['custom_studies']
+    base_selected = set(code for code in base_inputs['selected_studies'] if code in STUDY_INDEX)
+    for code in set(base_studies) - base_selected:
+        for key, column in STUDY_KEYS.items():
+            packed[column][:, STUDY_INDEX[code]] = base_studies[code][key]
+    for field, columns, index in (('custom_studies', STUDY_KEYS, STUDY_INDEX),
+                                  ('custom_team', TEAM_KEYS, TEAM_INDEX)):
+        edits_list = [fields.get(field, empty) for fields in fields_list]
+        present[field] = np.array([bool(edits) for edits in edits_list], dtype=bool)
+        for name in set().union(*edits_list):
+            edits = [edits.get(name, empty) for edits in edits_list]
+            for key, column in columns.items():
+                values = np.array([edit.get(key, np.nan) for edit in edits], dtype=float)
+                rows = ~np.isnan(values)
+                packed[column][rows, index[name]] = values[rows]
+    
+    added_list = [change.get('add_studies', ()) for change in changes]
+    removed_list = [change.get('remove_studies', ()) for change in changes]
+    for code in set().union(*added_list, *removed_list):
+        j, base_on = STUDY_INDEX[code], code in base_selected
+        added = np.array([code in codes for codes in added_list], dtype=bool)
+        removed = np.array([code in codes for codes in removed_list], dtype=bool)
+        on = (base_on | added) & ~removed
+        packed['selected'][on != base_on, j] = on[on != base_on]
+        packed['selected_count'] += on.astype(float) - base_on
+        if not base_on:
+            present['custom_studies'] |= on
+    
+    none = np.zeros(n, dtype=bool)
+    touched = {name: np.logical_or.reduce([present.get(field, none) for field in group] + [none])
+               for name, group in (('mw', MW_FIELDS), ('bus', BUS_FIELDS), ('fixed', FIXED_FIELDS))}
+    touched['study'], touched['team'] = present['custom_studies'], present['custom_team']
+    return packed, touched
+
+def _update_factors(baseline, packed, touched):
+    n = len(packed['facility_mw'])
+    factors = {key: np.repeat(value, n, axis=0) for key, value in baseline['factors'].items()}
+    
+    rows = touched['mw']
+    factors['mw_factor'][rows] = np.power(packed['facility_mw'][rows] / 10, packed['mw_exponent'][rows])
+    rows = touched['bus']
+    factors['total_buses'][rows] = packed['mv_buses'][rows] + packed['lv_buses'][rows]
+    factors['bus_factor'][rows] = np.power(factors['total_buses'][rows] / 32, packed['bus_exponent'][rows])
+    rows = touched['fixed']
+    factors['fixed_factor'][rows] = (packed['project_factor'][rows] * packed['voltage_factor'][rows] *
+                                     packed['region_factor'][rows] * packed['bus_confidence'][rows])
+    
+    rows = touched['mw'] | touched['bus'] | touched['fixed'] | touched['study']
+    adjusted_hrs = packed['base_hrs'][rows] * factors['bus_factor'][rows, None] * factors['mw_factor'][rows, None]
+    factors['study_hrs'][rows] = adjusted_hrs * (factors['fixed_factor'][rows, None] * packed['complexity'][rows])
+    rows = touched['team']
+    factors['blended_rate'][rows] = (packed['allocation'][rows] * packed['rate'][rows]).sum(axis=1)
+    return factors
+
+def evaluate_changes(baseline, changes):
+    packed, touched = _apply(baseline, changes)
+    return aggregate_batch(packed, _update_factors(baseline, packed, touched))
+
+def change_order_deltas(baseline, changes, labels=None):
+    results = evaluate_changes(baseline, changes)
+    base = baseline['results']
+    index = labels if labels is not None else [f"CO-{i + 1}" for i in range(len(changes))]
+    
+    components = pd.DataFrame({label: results[key] - base[key] for key, label in COST_COMPONENTS.items()},
+                              index=index)
+    components['Cost/Bus'] = results['cost_per_bus'] - base['cost_per_bus']
+    
+    study_totals = results['study_cost'] + results['report_cost']
+    base_totals = base['study_cost'] + base['report_cost']
+    studies = pd.DataFrame(study_totals - base_totals, index=index,
+                           columns=[DEFAULT_STUDIES[code]['name'] for code in STUDY_CODES])
+    return components, studies.loc[:, (studies != 0).any(axis=0)]
@@ -0,0 +1,183 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from estimator_engine import (PROJECT_FACTORS, VOLTAGE_FACTORS, REGION_FACTORS, DEFAULT_STUDIES, STUDY_CODES,
+                              STUDY_INDEX, TEAM_LEVELS, REPORT_PERCENT_MODE, COST_COMPONENTS, calculate_inputs)
+from batch_engine import calculate_batch
+from portfolio import evaluate_portfolio, pack_frame
+from change_orders import make_baseline, change_between, evaluate_changes
+from money import calculate_paise_batch
+from granular_effort import calculate_granular
+from pricing_matrix import REGIONS, load_fx_table, price_matrix
+
+# ============ RANDOMIZED INPUTS WITHIN FORM BOUNDS ============
+# (min, max, step) for every numeric widget on the page
+SCALAR_BOUNDS = {
+    'facility_mw': (0.5, 500.0, 0.5),
+    'mv_buses': (1, 200, 1),
+    'lv_buses': (1, 300, 1),
+    'mw_exponent': (0.5, 1.2, 0.05),
+    'bus_exponent': (0.7, 1.3, 0.05),
+    'bus_confidence': (0.9, 2.5, 0.1),
+    'buffer_percent': (5, 25, 1),
+    'report_percent': (10, 50, 5),
+    'report_fixed': (5000, 100000, 5000),
+    'report_complexity': (0.8, 1.5, 0.1)
+}
+STUDY_BOUNDS = {'hrs_': (5, 50, 1), 'cplx_': (0.5, 2.0, 0.05)}
+TEAM_BOUNDS = {
+    'rate_': {'L1': (1200, 3600, 100), 'L2': (600, 1800, 100), 'L3': (450, 1350, 100)},
+    'alloc_': {'L1': (0.05, 0.25, 0.01), 'L2': (0.20, 0.50, 0.01), 'L3': (0.30, 0.70, 0.01)}
+}
+REPORT_MODES = [REPORT_PERCENT_MODE, "Fixed Amount ₹"]
+
+OUTPUT_TOTALS = list(COST_COMPONENTS) + ['cost_per_bus', 'total_study_hours', 'total_report_hours',
+                                         'total_project_hours']
+PER_STUDY = {'studyHrs': 'study_hrs', 'reportHrs': 'report_hrs', 'studyCost': 'study_cost', 'reportCost': 'report_cost'}
+
+def _stepped(rng, bounds, n):
+    low, high, step = bounds
+    steps = int(round((high - low) / step))
+    return np.round(low + rng.integers(0, steps + 1, n) * step, 10)
+
+def random_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = {field: _stepped(rng, bounds, n) for field, bounds in SCALAR_BOUNDS.items()}
+    frame['project_type'] = rng.choice(list(PROJECT_FACTORS), n)
+    frame['voltage'] = rng.choice(list(VOLTAGE_FACTORS), n)
+    frame['region'] = rng.choice(list(REGION_FACTORS), n)
+    frame['report_mode'] = rng.choice(REPORT_MODES, n)
+    for prefix, bounds in STUDY_BOUNDS.items():
+        for code in STUDY_CODES:
+            frame[prefix + code] = _stepped(rng, bounds, n)
+    for code in STUDY_CODES:
+        frame['sel_' + code] = rng.integers(0, 2, n)
+    for prefix, levels in TEAM_BOUNDS.items():
+        for level, bounds in levels.items():
+            frame[prefix + level] = _stepped(rng, bounds, n)
+    # Integer widgets come back from Streamlit as ints
+    for field in ('mv_buses', 'lv_buses', 'buffer_percent', 'report_percent', 'report_fixed'):
+        frame[field] = frame[field].astype(np.int64)
+    return pd.DataFrame(frame)
+
+def frame_to_inputs(frame):
+    inputs_list = []
+    for row in frame.to_dict('records'):
+        inputs = {field: row[field] for field in SCALAR_BOUNDS}
+        inputs.update(project_type=row['project_type'], voltage=row['voltage'], region=row['region'],
+                      report_mode=row['report_mode'])
+        inputs['custom_studies'] = {code: {'baseHrs': row['hrs_' + code], 'complexity': row['cplx_' + code]}
+                                    for code in STUDY_CODES}
+        inputs['custom_team'] = {level: {'rate': row['rate_' + level], 'allocation': row['alloc_' + level]}
+                                 for level in TEAM_LEVELS}
+        inputs['selected_studies'] = [code for code in STUDY_CODES if row['sel_' + code]]
+        inputs_list.append(inputs)
+    return inputs_list
+
+# ============ REFERENCE & FAST PATHS ============
+def reference_outputs(inputs_list):
+    name_index = {DEFAULT_STUDIES[code]['name']: STUDY_INDEX[code] for code in STUDY_CODES}
+    n = len(inputs_list)
+    outputs = {key: np.zeros(n) for key in OUTPUT_TOTALS}
+    outputs.update({key: np.zeros((n, len(STUDY_CODES))) for key in PER_STUDY.values()})
+    for i, inputs in enumerate(inputs_list):
+        results = calculate_inputs(inputs)
+        for key in OUTPUT_TOTALS:
+            outputs[key][i] = results[key]
+        for study in results['study_results']:
+            j = name_index[study['name']]
+            for source, key in PER_STUDY.items():
+                outputs[key][i, j] = study[source]
+    return outputs
+
+def _portfolio_path(frame, inputs_list, sample):
+    results = evaluate_portfolio(frame).iloc[sample]
+    outputs = {key: results[key].to_numpy() for key in OUTPUT_TOTALS}
+    outputs['study_hrs'] = results[['hours_' + code for code in STUDY_CODES]].to_numpy()
+    return outputs
+
+def _change_order_path(frame, inputs_list, sample):
+    baseline = make_baseline(inputs_list[0])
+    return evaluate_changes(baseline, [change_between(baseline['inputs'], inputs) for inputs in inputs_list])
+
+def _granular_path(frame, inputs_list, sample):
+    outputs = {key: [] for key in OUTPUT_TOTALS}
+    for inputs in inputs_list:
+        # A table of reference buses must reproduce the lumped model
+        bus_table = pd.DataFrame({'kv': np.full(inputs['mv_buses'] + inputs['lv_buses'], 0.415)})
+        results = calculate_granular(inputs, bus_table)
+        for key in OUTPUT_TOTALS:
+            outputs[key].append(results[key])
+    return {key: np.array(values) for key, values in outputs.items()}
+
+def _money_path(frame, inputs_list, sample):
+    paise = calculate_paise_batch(inputs_list)
+    return {key: paise[key] / 100 for key in list(COST_COMPONENTS) + ['cost_per_bus']}
+
+def _price_matrix_path(frame, inputs_list, sample):
+    # Each row's own region, in the base currency
+    matrix = price_matrix(pack_frame(frame.iloc[sample]), load_fx_table(), currencies=['INR'])
+    region = frame['region'].iloc[sample].map(REGIONS.index).to_numpy()
+    rows = np.arange(len(sample))
+    return {key: matrix[key][rows, region, 0] for key in ('grand_total', 'cost_per_bus')}
+
+# name -> (evaluate(frame, inputs_list, sample_rows), default sample cap, absolute tolerance)
+FAST_PATHS = {
+    'batch_engine': (lambda frame, inputs_list, sample: calculate_batch(inputs_list), None, 1e-6),
+    'portfolio': (_portfolio_path, None, 1e-6),
+    'change_orders': (_change_order_path, None, 1e-6),
+    'money_paise': (_money_path, None, 0.05),
+    'price_matrix': (_price_matrix_path, None, 1e-6),
+    'granular_reference_buses': (_granular_path, 2000, 1e-6)
+}
+
+def compare(reference, outputs, abs_tol, rel_tol=1e-9):
+    worst, failures = 0.0, np.zeros(len(reference['grand_total']), dtype=bool)
+    for key, values in outputs.items():
+        if key not in reference:
+            continue
+        expected = reference[key]
+        error = np.abs(values - expected)
+        allowed = abs_tol + rel_tol * np.abs(expected)
+        bad = error > allowed
+        failures |= bad if bad.ndim == 1 else bad.any(axis=1)
+        worst = max(worst, float(np.max(error / allowed)) if error.size else 0.0)
+    return worst, failures
+
+def run(n, reference_sample, seed=0, paths=None, out=print):
+    started = time.time()
+    frame = random_frame(n, seed)
+    sample = np.sort(np.random.default_rng(seed + 1).choice(n, min(reference_sample, n), replace=False))
+    inputs_list = frame_to_inputs(frame.iloc[sample])
+    reference = reference_outputs(inputs_list)
+    out(f"{n:,} random input sets, {len(sample):,} checked against calculateAll ({time.time() - started:.1f} s)")
+    
+    ok = True
+    for name in paths or FAST_PATHS:
+        evaluate, cap, abs_tol = FAST_PATHS[name]
+        rows = slice(None) if cap is None else slice(0, cap)
+        path_started = time.time()
+        outputs = evaluate(frame, inputs_list[rows], sample[rows])
+        expected = {key: value[rows] for key, value in reference.items()}
+        worst, failures = compare(expected, outputs, abs_tol)
+        status = "OK" if not failures.any() else f"FAIL ({failures.sum():,} rows)"
+        out(f"  {name:<26} {status:<16} worst error/tolerance {worst:.3g}  ({time.time() - path_started:.1f} s)")
+        if failures.any():
+            ok = False
+            out(f"    first failing inputs: {inputs_list[rows][int(np.argmax(failures))]}")
+    out(f"Total {time.time() - started:.1f} s")
+    return ok
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare every fast path against calculateAll on random inputs")
+    parser.add_argument('--n', type=int, default=1_000_000, help="Random input sets to generate")
+    parser.add_argument('--reference-sample', type=int, default=200_000,
+                        help="Rows evaluated through calculateAll and compared")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--paths', nargs='+', choices=list(FAST_PATHS), help="Fast paths to check (default: all)")
+    args = parser.parse_args()
+    sys.exit(0 if run(args.n, args.reference_sample, args.seed, args.paths) else 1)
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from estimator_engine import STUDY_CODES, TEAM_LEVELS, MODELLING_PERCENT, MODELLING_RATE
+from batch_engine import pack_inputs, compute_factors, aggregate_batch
+
+# ============ CLOSED-FORM PARTIAL DERIVATIVES ============
+# With scale = bus_factor * mw_factor * project * voltage * region * confidence,
+# total study hours are H = scale * sum(baseHrs * complexity * selected) and
+#   subtotal = rate * H + reporting(H) + meetings + 1200 * 0.30 * (H + report hours + meetings hours)
+#   grand_total = subtotal * (1 + buffer / 100),  cost_per_bus = grand_total / buses
+# so every partial follows from dG/dH and the partials of H.
+def jacobian(packed):
+    factors = compute_factors(packed)
+    batch = aggregate_batch(packed, factors)
+    
+    buses = factors['total_buses']
+    hours = batch['total_study_hours']
+    blended_rate = factors['blended_rate']
+    percent_mode = packed['percent_mode']
+    report_share = np.where(percent_mode, packed['report_percent'] / 100, 0.0)
+    report_complexity = packed['report_complexity']
+    modelling_rate = MODELLING_PERCENT * MODELLING_RATE
+    buffer_factor = 1 + packed['buffer_percent'] / 100
+    
+    # dSubtotal/dH: study cost, % reporting, and modelling on study + report hours
+    dsub_dh = blended_rate + report_share * 1200 * report_complexity + modelling_rate * (1 + report_share)
+    dg_dh = buffer_factor * dsub_dh
+    scale = factors['bus_factor'] * factors['mw_factor'] * factors['fixed_factor']
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dh_dbuses = hours * packed['bus_exponent'] / buses
+        grad = {
+            'facility_mw': dg_dh * hours * packed['mw_exponent'] / packed['facility_mw'],
+            'mv_buses': dg_dh * dh_dbuses,
+            'lv_buses': dg_dh * dh_dbuses,
+            'mw_exponent': dg_dh * hours * np.log(packed['facility_mw'] / 10),
+            'bus_exponent': dg_dh * hours * np.log(buses / 32),
+            'project_factor': dg_dh * hours / packed['project_factor'],
+            'voltage_factor': dg_dh * hours / packed['voltage_factor'],
+            'region_factor': dg_dh * hours / packed['region_factor'],
+            'bus_confidence': dg_dh * hours / packed['bus_confidence'],
+        }
+    grad['buffer_percent'] = batch['subtotal'] / 100
+    grad['report_percent'] = np.where(percent_mode, buffer_factor * hours / 100 * (1200 * report_complexity + modelling_rate), 0.0)
+    grad['report_fixed'] = np.where(percent_mode, 0.0, buffer_factor * packed['selected_count'] / 7)
+    grad['report_complexity'] = buffer_factor * batch['total_report_hours'] * 1200
+    
+    for j, code in enumerate(STUDY_CODES):
+        dh_dstudy = scale * packed['selected'][:, j]
+        grad[f'baseHrs[{code}]'] = dg_dh * dh_dstudy * packed['complexity'][:, j]
+        grad[f'complexity[{code}]'] = dg_dh * dh_dstudy * packed['base_hrs'][:, j]
+    for k, level in enumerate(TEAM_LEVELS):
+        grad[f'rate[{level}]'] = buffer_factor * hours * packed['allocation'][:, k]
+        grad[f'allocation[{level}]'] = buffer_factor * hours * packed['rate'][:, k]
+    
+    grand_total = pd.DataFrame(grad)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cost_per_bus = grand_total.div(buses, axis=0)
+        # Bus counts also appear in the cost_per_bus denominator
+        for field in ('mv_buses', 'lv_buses'):
+            cost_per_bus[field] -= batch['grand_total'] / buses ** 2
+    return {'grand_total': grand_total, 'cost_per_bus': cost_per_bus}
+
+def parameter_values(packed):
+    values = {field: packed[field] for field in ('facility_mw', 'mv_buses', 'lv_buses', 'mw_exponent', 'bus_exponent',
+                                                 'project_factor', 'voltage_factor', 'region_factor', 'bus_confidence',
+                                                 'buffer_percent', 'report_percent', 'report_fixed', 'report_complexity')}
+    for j, code in enumerate(STUDY_CODES):
+        values[f'baseHrs[{code}]'] = packed['base_hrs'][:, j]
+        values[f'complexity[{code}]'] = packed['complexity'][:, j]
+    for k, level in enumerate(TEAM_LEVELS):
+        values[f'rate[{level}]'] = packed['rate'][:, k]
+        values[f'allocation[{level}]'] = packed['allocation'][:, k]
+    return pd.DataFrame(values)
+
+def elasticity(packed):
+    # d ln(output) / d ln(parameter): % change in output per 1% change in the input
+    grads = jacobian(packed)
+    batch = aggregate_batch(packed, compute_factors(packed))
+    values = parameter_values(packed)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {output: grad * values[grad.columns] / batch[output][:, None] for output, grad in grads.items()}
+
+def jacobian_inputs(inputs_list):
+    return jacobian(pack_inputs(inputs_list))
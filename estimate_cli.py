@@ -0,0 +1,176 @@
+import argparse
+import json
+import os
+import sys
+
+from estimator_engine import (PROJECT_FACTORS, VOLTAGE_FACTORS, REGION_FACTORS, STUDY_CODES, INPUT_FIELDS,
+                              default_inputs, calculate_inputs, format_currency, format_number)
+
+# ============ COMMAND-LINE ESTIMATOR ============
+# Pricing a single project only needs the pure-Python engine. numpy/pandas
+# are imported inside the commands that do tabular I/O, and check-imports
+# keeps it that way by measuring this module with -X importtime.
+IMPORT_BUDGET_MS = 50
+HEAVY_MODULES = ('numpy', 'pandas', 'pyarrow', 'streamlit')
+
+def _load_inputs(path):
+    # Accepts an inputs dict, or the app's JSON export with its 'inputs' section
+    with open(path, encoding='utf-8') as f:
+        source = json.load(f)
+    inputs = source.get('inputs', source) if isinstance(source, dict) else source
+    if not isinstance(inputs, dict):
+        raise ValueError(f"{path}: expected a JSON object of inputs")
+    unknown = sorted(set(inputs) - set(INPUT_FIELDS))
+    if unknown:
+        raise ValueError(f"{path}: unknown input field(s): {', '.join(unknown)}")
+    return inputs
+
+def _check_studies(codes, source):
+    unknown = [code for code in codes if code not in STUDY_CODES]
+    if unknown:
+        raise ValueError(f"{source}: unknown study code(s): {', '.join(unknown)} "
+                         f"(expected {', '.join(STUDY_CODES)})")
+
+def _price(args):
+    inputs = default_inputs()
+    if args.inputs:
+        loaded = _load_inputs(args.inputs)
+        _check_studies(list(loaded.get('selected_studies', [])) + list(loaded.get('custom_studies', {})), args.inputs)
+        # Studies and levels given in the file are merged over the defaults
+        for field in ('custom_studies', 'custom_team'):
+            if field in loaded:
+                loaded[field] = dict(inputs[field], **{key: dict(inputs[field].get(key, {}), **value)
+                                                       for key, value in loaded[field].items()})
+        inputs.update(loaded)
+    overrides = {'facility_mw': args.mw, 'mv_buses': args.mv, 'lv_buses': args.lv,
+                 'project_type': args.project_type, 'voltage': args.voltage, 'region': args.region,
+                 'buffer_percent': args.buffer}
+    inputs.update({field: value for field, value in overrides.items() if value is not None})
+    if args.studies:
+        inputs['selected_studies'] = [code.strip() for code in args.studies.split(',') if code.strip()]
+        _check_studies(inputs['selected_studies'], '--studies')
+    
+    results = calculate_inputs(inputs)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    
+    for study in results['study_results']:
+        print(f"{study['name']:<28} {format_number(study['studyHrs']):>10} hrs  {format_currency(study['studyCost']):>14}")
+    print(f"{'Total Hours':<28} {format_number(results['total_project_hours']):>10}")
+    print(f"{'Grand Total':<28} {format_currency(results['grand_total']):>14}")
+    print(f"{'Cost Per Bus':<28} {format_currency(results['cost_per_bus']):>14}")
+    return 0
+
+def _portfolio(args):
+    from portfolio import load_portfolio, evaluate_portfolio, rollup
+    
+    frame = load_portfolio(args.file)
+    if args.workers:
+        # Rollups stream back per chunk; progress goes to stderr
+        from worker_pool import WorkerPool, portfolio_rollup_job, combine_rollups
+        pool = WorkerPool(args.workers)
+        job = portfolio_rollup_job(pool, frame, args.group_by)
+        partials = {}
+        for index, partial in job.stream():
+            partials[index] = partial
+            print(f"\r{len(partials)}/{job.chunks} chunks", end='', file=sys.stderr)
+        print(file=sys.stderr)
+        pool.shutdown()
+        summary = combine_rollups(partials)
+    else:
+        summary = rollup(evaluate_portfolio(frame, exact_money=True), args.group_by)
+    if args.out:
+        summary.to_csv(args.out)
+    else:
+        print(summary.to_string())
+    return 0
+
+def _price_matrix(args):
+    from portfolio import load_portfolio
+    from pricing_matrix import load_fx_table, portfolio_price_matrix
+    
+    fx = load_fx_table(args.fx_version)
+    results = portfolio_price_matrix(load_portfolio(args.file), fx, args.regions, args.currencies)
+    if args.out:
+        results.to_csv(args.out, index=False)
+    else:
+        print(results.to_string())
+    return 0
+
+def measure_import_ms(module='estimate_cli'):
+    import subprocess
+    
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                               cwd=os.path.dirname(os.path.abspath(__file__)),
+                               capture_output=True, text=True, check=True)
+    imported, cumulative_us = set(), 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        fields = [field.strip() for field in line.split(':', 1)[1].split('|')]
+        if not fields[0].isdigit():
+            continue
+        imported.add(fields[2].split('.')[0])
+        if fields[2] == module:
+            cumulative_us = int(fields[1])
+    return cumulative_us / 1000, imported
+
+def _check_imports(args):
+    elapsed_ms, imported = measure_import_ms()
+    heavy = sorted(imported & set(HEAVY_MODULES))
+    print(f"import estimate_cli: {elapsed_ms:.1f} ms (budget {args.budget} ms)")
+    if heavy:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(heavy)}")
+    if elapsed_ms > args.budget:
+        print("FAIL: import time over budget")
+    return 1 if heavy or elapsed_ms > args.budget else 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Power Systems Cost Estimator")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    price = commands.add_parser('price', help="Price one project")
+    price.add_argument('--inputs', help="JSON file of calculateAll inputs (missing fields use form defaults)")
+    price.add_argument('--mw', type=float, help="Facility capacity (MW)")
+    price.add_argument('--mv', type=int, help="MV bus count")
+    price.add_argument('--lv', type=int, help="LV bus count")
+    price.add_argument('--project-type', choices=list(PROJECT_FACTORS))
+    price.add_argument('--voltage', choices=list(VOLTAGE_FACTORS))
+    price.add_argument('--region', choices=list(REGION_FACTORS))
+    price.add_argument('--buffer', type=float, help="Contingency buffer %%")
+    price.add_argument('--studies', help=f"Comma-separated study codes ({', '.join(STUDY_CODES)})")
+    price.add_argument('--json', action='store_true', help="Print the full result as JSON")
+    price.set_defaults(handler=_price)
+    
+    portfolio = commands.add_parser('portfolio', help="Roll up an estimates file")
+    portfolio.add_argument('file', help="CSV, Parquet or JSON estimates file")
+    portfolio.add_argument('--group-by', nargs='+', default=['region'],
+                           choices=['region', 'project_type', 'voltage'])
+    portfolio.add_argument('--out', help="Write the rollup to this CSV instead of printing it")
+    portfolio.add_argument('--workers', type=int, help="Evaluate in chunks on this many worker processes")
+    portfolio.set_defaults(handler=_portfolio)
+    
+    matrix = commands.add_parser('price-matrix', help="Price an estimates file in every region and currency")
+    matrix.add_argument('file', help="CSV, Parquet or JSON estimates file")
+    matrix.add_argument('--fx-version', help="FX table version from fx_rates.json (default: latest)")
+    matrix.add_argument('--regions', nargs='+', choices=list(REGION_FACTORS))
+    matrix.add_argument('--currencies', nargs='+', help="Currency codes (default: all in the FX table)")
+    matrix.add_argument('--out', help="Write the matrix to this CSV instead of printing it")
+    matrix.set_defaults(handler=_price_matrix)
+    
+    check = commands.add_parser('check-imports', help="Fail if CLI start-up exceeds the import budget")
+    check.add_argument('--budget', type=float, default=IMPORT_BUDGET_MS, help="Budget in milliseconds")
+    check.set_defaults(handler=_check_imports)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        return args.handler(args)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+import json
+import os
+
+# ============ ORIGINAL CONSTANTS & CALCULATIONS ============
+MEETINGS_RATE = 800
+MEETINGS_COUNT = 4
+MEETINGS_HRS = 1.5
+MODELLING_PERCENT = 0.30
+MODELLING_RATE = 1200
+
+PROJECT_FACTORS = {
+    'Commercial': 0.85, 'Industrial': 1.10, 'Pharma': 1.20,
+    'Hospital': 1.25, 'Metro/Infrastructure': 1.30, 'Oil & Gas': 1.40, 'Business Park': 0.80
+}
+
+VOLTAGE_FACTORS = {'11': 1.00, '33': 1.15, '66': 1.30, '132': 1.50, '220': 1.75}
+REGION_FACTORS = {'Domestic': 1.00, 'SouthAsia': 1.05, 'SeAsia': 1.35, 'MiddleEast': 1.75, 'APAC': 1.55, 'Europe': 2.00}
+
+# ============ STUDY CATALOG ============
+# Study types are data, not code: one entry per study in study_catalog.json
+# with its display info, default hours/complexity, scheduling and bus weights.
+STUDY_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'study_catalog.json')
+
+def load_study_catalog(path=STUDY_CATALOG_PATH):
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    return {entry['code']: entry for entry in entries}
+
+STUDY_CATALOG = load_study_catalog()
+
+DEFAULT_STUDIES = {code: {'name': entry['name'], 'baseHrs': entry['baseHrs'], 'complexity': entry['complexity']}
+                   for code, entry in STUDY_CATALOG.items()}
+STUDY_CATEGORIES = sorted({entry.get('category', 'Other') for entry in STUDY_CATALOG.values()})
+
+DEFAULT_TEAM = {
+    'L1': {'rate': 2400, 'allocation': 0.15},
+    'L2': {'rate': 1200, 'allocation': 0.35},
+    'L3': {'rate': 900, 'allocation': 0.50}
+}
+
+# ============ HELPER FUNCTIONS ============
+def format_currency(amount):
+    return f"₹{amount:,.0f}"
+
+def format_number(num):
+    return f"{num:,.1f}"
+
+# ============ ORIGINAL CALCULATE FUNCTION ============
+def calculateAll(facility_mw, mv_buses, lv_buses, project_type, voltage, region,
+                mw_exponent, bus_exponent, bus_confidence, buffer_percent,
+                report_mode, report_percent, report_fixed, report_complexity,
+                custom_studies, custom_team, selected_studies):
+    
+    total_buses = mv_buses + lv_buses
+    mw_per_bus = facility_mw / total_buses
+    
+    # Calculate factors
+    mw_factor = pow(facility_mw / 10, mw_exponent)
+    bus_factor = pow(total_buses / 32, bus_exponent)
+    project_factor = PROJECT_FACTORS.get(project_type, 1.0)
+    voltage_factor = VOLTAGE_FACTORS.get(voltage, 1.0)
+    region_factor = REGION_FACTORS.get(region, 1.0)
+    
+    # Calculate studies
+    study_results = []
+    total_study_hours = 0
+    total_report_hours = 0
+    total_study_cost = 0
+    
+    for code in selected_studies:
+        if code not in DEFAULT_STUDIES:
+            continue
+        
+        study = DEFAULT_STUDIES[code]
+        base_hrs = custom_studies[code]['baseHrs']
+        complexity = custom_studies[code]['complexity']
+        
+        adjusted_study_hrs = base_hrs * pow(total_buses / 32, bus_exponent) * pow(facility_mw / 10, mw_exponent)
+        all_factors = project_factor * voltage_factor * region_factor * bus_confidence * complexity
+        final_study_hrs = adjusted_study_hrs * all_factors
+        
+        # Team allocation for this study
+        l1_hours = final_study_hrs * custom_team['L1']['allocation']
+        l2_hours = final_study_hrs * custom_team['L2']['allocation']
+        l3_hours = final_study_hrs * custom_team['L3']['allocation']
+        
+        blended_rate = (l1_hours * custom_team['L1']['rate'] + 
+                       l2_hours * custom_team['L2']['rate'] + 
+                       l3_hours * custom_team['L3']['rate']) / final_study_hrs if final_study_hrs > 0 else 0
+        
+        study_cost = final_study_hrs * blended_rate
+        
+        # Reporting
+        report_hrs = 0
+        if report_mode == "% of Study Cost":
+            report_pct = report_percent / 100
+            report_hrs = final_study_hrs * report_pct
+        
+        total_study_hours += final_study_hrs
+        total_report_hours += report_hrs
+        total_study_cost += study_cost
+        
+        study_results.append({
+            'name': study['name'],
+            'studyHrs': final_study_hrs,
+            'reportHrs': report_hrs,
+            'studyCost': study_cost,
+            'reportCost': report_hrs * blended_rate * report_complexity
+        })
+    
+    # Reporting cost
+    total_reporting_cost = 0
+    if report_mode == "% of Study Cost":
+        total_reporting_cost = total_report_hours * 1200 * report_complexity
+    else:
+        total_reporting_cost = report_fixed * (len(selected_studies) / 7)
+    
+    # Additional costs
+    total_project_hours = total_study_hours + total_report_hours + (MEETINGS_COUNT * MEETINGS_HRS)
+    meetings_cost = MEETINGS_COUNT * MEETINGS_HRS * MEETINGS_RATE
+    modelling_hours = total_project_hours * MODELLING_PERCENT
+    modelling_cost = modelling_hours * MODELLING_RATE
+    
+    # Final costs
+    subtotal = total_study_cost + total_reporting_cost + meetings_cost + modelling_cost
+    buffer = subtotal * (buffer_percent / 100)
+    grand_total = subtotal + buffer
+    
+    cost_per_bus = grand_total / total_buses if total_buses > 0 else 0
+    
+    return {
+        'total_buses': total_buses,
+        'mw_per_bus': mw_per_bus,
+        'total_study_hours': total_study_hours,
+        'total_report_hours': total_report_hours,
+        'total_project_hours': total_project_hours,
+        'total_study_cost': total_study_cost,
+        'total_reporting_cost': total_reporting_cost,
+        'meetings_cost': meetings_cost,
+        'modelling_cost': modelling_cost,
+        'subtotal': subtotal,
+        'buffer': buffer,
+        'grand_total': grand_total,
+        'cost_per_bus': cost_per_bus,
+        'study_results': study_results
+    }
+
+# ============ INPUT SETS ============
+# An input set is a dict of calculateAll arguments keyed by parameter name.
+STUDY_CODES = list(DEFAULT_STUDIES.keys())
+STUDY_INDEX = {code: j for j, code in enumerate(STUDY_CODES)}
+TEAM_LEVELS = list(DEFAULT_TEAM.keys())
+
+DEFAULT_SELECTION = [code for code in STUDY_CODES if STUDY_CATALOG[code].get('default', False)]
+REPORT_PERCENT_MODE = "% of Study Cost"
+
+INPUT_FIELDS = (
+    'facility_mw', 'mv_buses', 'lv_buses', 'project_type', 'voltage', 'region',
+    'mw_exponent', 'bus_exponent', 'bus_confidence', 'buffer_percent',
+    'report_mode', 'report_percent', 'report_fixed', 'report_complexity',
+    'custom_studies', 'custom_team', 'selected_studies'
+)
+
+COST_COMPONENTS = {
+    'total_study_cost': 'Studies',
+    'total_reporting_cost': 'Reporting',
+    'modelling_cost': 'Modelling (30%)',
+    'meetings_cost': 'Meetings',
+    'buffer': 'Buffer',
+    'grand_total': 'Grand Total'
+}
+
+def default_inputs():
+    return {
+        'facility_mw': 10.0, 'mv_buses': 24, 'lv_buses': 54,
+        'project_type': 'Commercial', 'voltage': '33', 'region': 'Domestic',
+        'mw_exponent': 0.8, 'bus_exponent': 0.9, 'bus_confidence': 1.0, 'buffer_percent': 15,
+        'report_mode': REPORT_PERCENT_MODE, 'report_percent': 35, 'report_fixed': 30000,
+        'report_complexity': 1.0,
+        'custom_studies': {code: {'baseHrs': study['baseHrs'], 'complexity': study['complexity']}
+                           for code, study in DEFAULT_STUDIES.items()},
+        'custom_team': {level: dict(team) for level, team in DEFAULT_TEAM.items()},
+        'selected_studies': list(DEFAULT_SELECTION)
+    }
+
+def calculate_inputs(inputs):
+    return calculateAll(*(inputs[field] for field in INPUT_FIELDS))
+
+def filter_studies(query='', category=None):
+    query = query.strip().lower()
+    return [code for code, entry in STUDY_CATALOG.items()
+            if (not category or entry.get('category') == category)
+            and (not query or query in entry['name'].lower() or query in code)]
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from estimator_engine import STUDY_CATALOG, STUDY_CODES
+from batch_engine import pack_inputs, compute_factors, aggregate_batch, batch_to_results
+from network_import import LV_MAX_KV, CSV_KV_COLUMNS
+
+# ============ PER-BUS EFFORT WEIGHTS ============
+# Each bus contributes a weight per study instead of counting as exactly one
+# bus. A reference bus (LV, REFERENCE_DEVICES devices, no motors) weighs 1.0,
+# so a table of reference buses reproduces the lumped bus_factor. The kV column
+# is required and may use any of the network import's kV column names.
+BUS_TABLE_COLUMNS = {'devices': 4, 'motor_kw': 0.0}
+REFERENCE_DEVICES = 4
+MIN_BUS_WEIGHT = 0.25
+
+# Weight added per MV bus, per device above reference, and per MW of motor
+# load; studies can override these through 'bus_weights' in the catalog
+DEFAULT_BUS_WEIGHTS = {'mv': 0.20, 'device': 0.05, 'motor_mw': 0.10}
+STUDY_BUS_WEIGHTS = {code: dict(DEFAULT_BUS_WEIGHTS, **entry.get('bus_weights', {}))
+                     for code, entry in STUDY_CATALOG.items()}
+
+def load_bus_table(source):
+    frame = pd.read_csv(source)
+    frame.columns = [name.strip().lower() for name in frame.columns]
+    _bus_features(frame)  # a table without usable kV values fails on upload, not on every estimate
+    return frame
+
+def _bus_features(bus_table):
+    n = len(bus_table)
+    column = lambda name: (np.asarray(bus_table[name], dtype=float) if name in bus_table
+                           else np.full(n, float(BUS_TABLE_COLUMNS[name])))
+    kv_name = next((name for name in CSV_KV_COLUMNS if name in bus_table), None)
+    if kv_name is None:
+        raise ValueError(f"No kV column found; expected one of: {', '.join(CSV_KV_COLUMNS)}")
+    kv = pd.to_numeric(bus_table[kv_name], errors='coerce').to_numpy(dtype=float)
+    if np.isnan(kv).any():
+        raise ValueError(f"Column {kv_name!r} needs a numeric kV value on every row")
+    features = np.column_stack([
+        kv > LV_MAX_KV,
+        column('devices') - REFERENCE_DEVICES,
+        column('motor_kw') / 1000
+    ])
+    return kv, features
+
+def bus_weights(bus_table):
+    kv, features = _bus_features(bus_table)
+    coefficients = np.array([[STUDY_BUS_WEIGHTS[code][key] for code in STUDY_CODES]
+                             for key in ('mv', 'device', 'motor_mw')])
+    return np.maximum(1.0 + features @ coefficients, MIN_BUS_WEIGHT)
+
+def calculate_granular(inputs, bus_table):
+    kv, _ = _bus_features(bus_table)
+    inputs = dict(inputs, mv_buses=int((kv > LV_MAX_KV).sum()), lv_buses=int((kv <= LV_MAX_KV).sum()))
+    effective_buses = bus_weights(bus_table).sum(axis=0)
+    
+    packed = pack_inputs([inputs])
+    factors = compute_factors(packed)
+    # Per-study effective bus counts replace the single total_buses scaling
+    bus_factor = np.power(effective_buses / 32, packed['bus_exponent'][:, None])
+    adjusted_hrs = packed['base_hrs'] * bus_factor * factors['mw_factor'][:, None]
+    factors['study_hrs'] = adjusted_hrs * (factors['fixed_factor'][:, None] * packed['complexity'])
+    
+    results = batch_to_results(aggregate_batch(packed, factors), 0, inputs['selected_studies'])
+    results['effective_buses'] = dict(zip(STUDY_CODES, effective_buses.tolist()))
+    return results
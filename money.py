@@ -0,0 +1,62 @@
+import numpy as np
+
+from batch_engine import pack_inputs, compute_factors, aggregate_batch
+
+# ============ EXACT MONEY (INT64 PAISE) ============
+# Rounding is half away from zero at fixed stages: each study cost, the
+# reporting, meetings and modelling totals, the buffer and cost per bus.
+# Everything after a stage is integer arithmetic, so sums over any number of
+# estimates match the per-estimate figures to the paisa.
+PAISE_PER_RUPEE = 100
+PERCENT_SCALE = 100  # buffer % is carried in hundredths of a percent
+
+def to_paise(rupees):
+    scaled = np.asarray(rupees, dtype=float) * PAISE_PER_RUPEE
+    return (np.sign(scaled) * np.floor(np.abs(scaled) + 0.5)).astype(np.int64)
+
+def divide_half_up(numerator, denominator):
+    numerator = np.asarray(numerator, dtype=np.int64)
+    denominator = np.asarray(denominator, dtype=np.int64)
+    quotient = (2 * np.abs(numerator) + denominator) // (2 * denominator)
+    return np.sign(numerator) * quotient
+
+def paise_batch(packed, batch):
+    study_cost = to_paise(batch['study_cost'])
+    total_study_cost = study_cost.sum(axis=1)
+    total_reporting_cost = to_paise(batch['total_reporting_cost'])
+    meetings_cost = to_paise(batch['meetings_cost'])
+    modelling_cost = to_paise(batch['modelling_cost'])
+    
+    subtotal = total_study_cost + total_reporting_cost + meetings_cost + modelling_cost
+    buffer_hundredths = np.rint(packed['buffer_percent'] * PERCENT_SCALE).astype(np.int64)
+    buffer = divide_half_up(subtotal * buffer_hundredths, 100 * PERCENT_SCALE)
+    grand_total = subtotal + buffer
+    
+    total_buses = batch['total_buses'].astype(np.int64)
+    cost_per_bus = np.where(total_buses > 0, divide_half_up(grand_total, np.maximum(total_buses, 1)), 0)
+    
+    return {
+        'total_study_cost': total_study_cost,
+        'total_reporting_cost': total_reporting_cost,
+        'meetings_cost': meetings_cost,
+        'modelling_cost': modelling_cost,
+        'subtotal': subtotal,
+        'buffer': buffer,
+        'grand_total': grand_total,
+        'cost_per_bus': cost_per_bus,
+        'study_cost': study_cost,
+        'report_cost': to_paise(batch['report_cost'])
+    }
+
+def calculate_paise_batch(inputs_list):
+    packed = pack_inputs(inputs_list)
+    return paise_batch(packed, aggregate_batch(packed, compute_factors(packed)))
+
+def calculate_paise(inputs):
+    paise = calculate_paise_batch([inputs])
+    return {key: value[0].tolist() for key, value in paise.items()}
+
+def format_paise(paise):
+    sign = '-' if paise < 0 else ''
+    rupees, remainder = divmod(abs(int(paise)), PAISE_PER_RUPEE)
+    return f"{sign}₹{rupees:,}.{remainder:02d}"
@@ -0,0 +1,123 @@
+import csv
+import io
+import re
+from collections import Counter
+
+from estimator_engine import VOLTAGE_FACTORS
+
+# ============ NETWORK MODEL IMPORT ============
+# Both parsers stream line by line and only keep a histogram of base kV
+# levels, so memory stays bounded by the number of distinct voltages.
+LV_MAX_KV = 1.0
+VOLTAGE_TOLERANCE = 0.10
+ISOLATED_BUS_TYPE = 4
+SYSTEM_WIDE_DATA_REV = 35
+CSV_KV_COLUMNS = ('basekv', 'base_kv', 'base kv', 'kv', 'voltage_kv', 'nominal_kv', 'nominal kv', 'un_kv')
+
+_RAW_TOKEN = re.compile(r"'[^']*'|\"[^\"]*\"|[^,\s]+")
+
+def _raw_fields(line):
+    fields = []
+    for token in _RAW_TOKEN.findall(line):
+        if token.startswith('/'):
+            break
+        fields.append(token)
+    return fields
+
+def _is_end_of_section(fields):
+    return not fields or fields[0] in ('0', 'Q')
+
+def _records(lines):
+    # (line number, line) with v35 '@!' column-heading comments skipped
+    for number, line in enumerate(lines, 1):
+        if not line.startswith('@!'):
+            yield number, line
+
+def _raw_revision(identification):
+    fields = _raw_fields(identification)
+    try:
+        return int(float(fields[2]))
+    except (IndexError, ValueError):
+        return 0
+
+def parse_raw(lines, include_isolated=False):
+    records = _records(lines)
+    # Identification record (IC,SBASE,REV,...) plus two case title lines
+    header = [line for _, line in zip(range(3), records)]
+    if header and _raw_revision(header[0][1]) >= SYSTEM_WIDE_DATA_REV:
+        # System-wide data (GENERAL, GAUSS, ..., RATING) precedes the buses from v35 on
+        for _, line in records:
+            if _is_end_of_section(_raw_fields(line)):
+                break
+    
+    levels = Counter()
+    kv_index = type_index = None
+    for number, line in records:
+        fields = _raw_fields(line)
+        if _is_end_of_section(fields):
+            break
+        if kv_index is None:
+            # Revisions 30+ start with I,'NAME',BASKV,IDE; older ones with I,IDE,PL,...,'NAME',BASKV
+            kv_index, type_index = (2, 3) if len(fields) > 1 and fields[1][0] in '\'"' else (10, 1)
+        if len(fields) <= max(kv_index, type_index):
+            continue
+        try:
+            bus_type, kv = int(fields[type_index]), float(fields[kv_index])
+        except ValueError:
+            raise ValueError(f"Line {number}: unreadable bus record: {line.strip()[:80]}")
+        if not include_isolated and bus_type == ISOLATED_BUS_TYPE:
+            continue
+        levels[kv] += 1
+    return levels
+
+def parse_bus_csv(lines):
+    reader = csv.reader(lines)
+    header = [name.strip().lower() for name in next(reader, [])]
+    kv_index = next((header.index(name) for name in CSV_KV_COLUMNS if name in header), None)
+    if kv_index is None:
+        raise ValueError(f"No kV column found; expected one of: {', '.join(CSV_KV_COLUMNS)}")
+    
+    levels = Counter()
+    for row in reader:
+        if len(row) > kv_index and row[kv_index].strip():
+            try:
+                levels[float(row[kv_index])] += 1
+            except ValueError:
+                raise ValueError(f"Row {reader.line_num}: kV value {row[kv_index]!r} is not a number")
+    return levels
+
+def voltage_class(max_kv):
+    # Smallest class that covers the highest voltage (within the tolerance), so
+    # 13.8 kV is priced as 33 kV rather than rounded down to 11 kV
+    for key in sorted(VOLTAGE_FACTORS, key=float):
+        if max_kv <= float(key) * (1 + VOLTAGE_TOLERANCE):
+            return key
+    return max(VOLTAGE_FACTORS, key=float)
+
+def summarize_levels(levels):
+    lv_buses = sum(count for kv, count in levels.items() if kv <= LV_MAX_KV)
+    mv_buses = sum(count for kv, count in levels.items() if kv > LV_MAX_KV)
+    max_kv = max(levels) if levels else 0.0
+    return {
+        'mv_buses': mv_buses,
+        'lv_buses': lv_buses,
+        'total_buses': mv_buses + lv_buses,
+        'max_kv': max_kv,
+        'voltage': voltage_class(max_kv),
+        'kv_levels': dict(sorted(levels.items()))
+    }
+
+def import_network(source, file_name=None, include_isolated=False):
+    name = (file_name or str(source)).lower()
+    if isinstance(source, (bytes, bytearray)):
+        handle = io.TextIOWrapper(io.BytesIO(source), encoding='utf-8-sig', errors='replace', newline='')
+    else:
+        handle = open(source, encoding='utf-8-sig', errors='replace', newline='')
+    with handle:
+        if name.endswith('.raw'):
+            levels = parse_raw(handle, include_isolated)
+        else:
+            levels = parse_bus_csv(handle)
+    if not levels:
+        raise ValueError("No bus records found in the network model")
+    return summarize_levels(levels)
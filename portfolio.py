@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+from estimator_engine import (PROJECT_FACTORS, VOLTAGE_FACTORS, REGION_FACTORS, DEFAULT_STUDIES, STUDY_CODES,
+                              TEAM_LEVELS, REPORT_PERCENT_MODE, COST_COMPONENTS, default_inputs)
+from batch_engine import compute_factors, aggregate_batch
+from money import paise_batch
+
+# ============ PORTFOLIO FILE LAYOUT ============
+# One row per estimate. Scalar calculateAll inputs keep their argument names;
+# per-study and per-level inputs are flattened into suffixed columns. Missing
+# columns fall back to the form defaults, any other column is kept as a label.
+SCALAR_FIELDS = ['facility_mw', 'mv_buses', 'lv_buses', 'mw_exponent', 'bus_exponent',
+                 'bus_confidence', 'buffer_percent', 'report_percent', 'report_fixed', 'report_complexity']
+CATEGORY_FIELDS = ['project_type', 'voltage', 'region', 'report_mode']
+
+STUDY_COLUMNS = {'baseHrs': 'hrs_', 'complexity': 'cplx_'}
+TEAM_COLUMNS = {'rate': 'rate_', 'allocation': 'alloc_'}
+
+ROLLUP_METRICS = ['total_study_hours', 'total_project_hours'] + list(COST_COMPONENTS.keys())
+
+def input_columns():
+    columns = SCALAR_FIELDS + CATEGORY_FIELDS
+    for prefix in list(STUDY_COLUMNS.values()) + ['sel_']:
+        columns += [prefix + code for code in STUDY_CODES]
+    for prefix in TEAM_COLUMNS.values():
+        columns += [prefix + level for level in TEAM_LEVELS]
+    return columns
+
+def inputs_to_frame(inputs_list, labels=None):
+    rows = []
+    for inputs in inputs_list:
+        row = {field: inputs[field] for field in SCALAR_FIELDS + CATEGORY_FIELDS}
+        for code in STUDY_CODES:
+            study = inputs['custom_studies'].get(code, DEFAULT_STUDIES[code])
+            for key, prefix in STUDY_COLUMNS.items():
+                row[prefix + code] = study[key]
+            row['sel_' + code] = int(code in inputs['selected_studies'])
+        for level in TEAM_LEVELS:
+            for key, prefix in TEAM_COLUMNS.items():
+                row[prefix + level] = inputs['custom_team'][level][key]
+        rows.append(row)
+    frame = pd.DataFrame(rows, columns=input_columns())
+    if labels is not None:
+        for name, values in labels.items():
+            frame[name] = values
+    return frame
+
+def load_portfolio(source, file_name=None):
+    name = (file_name or str(source)).lower()
+    if name.endswith('.parquet'):
+        frame = pd.read_parquet(source)
+    elif name.endswith('.json'):
+        frame = pd.read_json(source, orient='records')
+    else:
+        frame = pd.read_csv(source, dtype={'voltage': str})
+    for field in CATEGORY_FIELDS:
+        if field in frame:
+            frame[field] = frame[field].astype(str).astype('category')
+    return frame
+
+# ============ VECTORIZED PACKING ============
+def pack_frame(frame):
+    n = len(frame)
+    defaults = default_inputs()
+    
+    def column(name, default):
+        if name in frame:
+            return frame[name].to_numpy(dtype=float)
+        return np.full(n, float(default))
+    
+    def lookup(field, table):
+        if field not in frame:
+            return np.full(n, table.get(defaults[field], 1.0))
+        return frame[field].map(table).astype(float).fillna(1.0).to_numpy()
+    
+    def matrix(prefix, keys, default):
+        return np.column_stack([column(prefix + key, default(key)) for key in keys])
+    
+    packed = {field: column(field, defaults[field]) for field in SCALAR_FIELDS}
+    packed['project_factor'] = lookup('project_type', PROJECT_FACTORS)
+    packed['voltage_factor'] = lookup('voltage', VOLTAGE_FACTORS)
+    packed['region_factor'] = lookup('region', REGION_FACTORS)
+    if 'report_mode' in frame:
+        packed['percent_mode'] = (frame['report_mode'] == REPORT_PERCENT_MODE).to_numpy(dtype=bool)
+    else:
+        packed['percent_mode'] = np.full(n, defaults['report_mode'] == REPORT_PERCENT_MODE)
+    
+    packed['base_hrs'] = matrix('hrs_', STUDY_CODES, lambda code: defaults['custom_studies'][code]['baseHrs'])
+    packed['complexity'] = matrix('cplx_', STUDY_CODES, lambda code: defaults['custom_studies'][code]['complexity'])
+    packed['selected'] = matrix('sel_', STUDY_CODES, lambda code: code in defaults['selected_studies'])
+    packed['selected_count'] = packed['selected'].sum(axis=1)
+    for key, prefix in TEAM_COLUMNS.items():
+        packed[key] = matrix(prefix, TEAM_LEVELS, lambda level: defaults['custom_team'][level][key])
+    return packed
+
+# ============ EVALUATION & ROLLUPS ============
+def evaluate_portfolio(frame, exact_money=False):
+    packed = pack_frame(frame)
+    batch = aggregate_batch(packed, compute_factors(packed))
+    
+    label_columns = [c for c in frame.columns if c not in set(input_columns())]
+    results = {c: frame[c] for c in label_columns if c in frame}
+    # Group-by keys are always present; a missing column holds the form default it was priced with
+    defaults = default_inputs()
+    for field in CATEGORY_FIELDS[:3]:
+        results[field] = (frame[field] if field in frame else
+                          pd.Categorical.from_codes(np.zeros(len(frame), dtype=np.int8), [defaults[field]]))
+    for key, value in batch.items():
+        if value.ndim == 1:
+            results[key] = value
+    for j, code in enumerate(STUDY_CODES):
+        results['hours_' + code] = batch['study_hrs'][:, j]
+    # Study hours split across the team exactly as calculateAll allocates them
+    for k, level in enumerate(TEAM_LEVELS):
+        results[level + '_hours'] = batch['total_study_hours'] * packed['allocation'][:, k]
+    if exact_money:
+        for key, value in paise_batch(packed, batch).items():
+            if value.ndim == 1:
+                results[key + '_paise'] = value
+    return pd.DataFrame(results, index=frame.index)
+
+def rollup(results, by, metrics=None):
+    metrics = metrics or ROLLUP_METRICS + [c for c in results.columns if c.endswith('_paise')]
+    return results.groupby(by, observed=True)[metrics].sum()
+
+def study_hours_by_type(results):
+    totals = results[['hours_' + code for code in STUDY_CODES]].sum()
+    totals.index = [DEFAULT_STUDIES[code]['name'] for code in STUDY_CODES]
+    return totals
+
+def level_hour_demand(results):
+    return results[[level + '_hours' for level in TEAM_LEVELS]].sum().rename(lambda c: c.split('_')[0])
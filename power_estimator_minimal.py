@@ -1,8 +1,31 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import io
 import json
+import os
 from datetime import datetime
-import math
+
+from estimator_engine import (PROJECT_FACTORS, VOLTAGE_FACTORS, REGION_FACTORS, DEFAULT_STUDIES, DEFAULT_TEAM,
+                              STUDY_CATALOG, STUDY_CATEGORIES, STUDY_CODES, DEFAULT_SELECTION, INPUT_FIELDS,
+                              format_currency, format_number, calculateAll, filter_studies, default_inputs)
+from batch_engine import pack_inputs
+from scenarios import add_scenario, evaluate_scenarios, component_delta_table, study_delta_table
+from portfolio import (load_portfolio, inputs_to_frame, evaluate_portfolio, rollup,
+                       study_hours_by_type, level_hour_demand, ROLLUP_METRICS)
+from network_import import import_network
+from granular_effort import load_bus_table, calculate_granular
+from staffing import portfolio_staffing
+from scheduler import load_roster, schedule_portfolio, awarded_projects
+from money import format_paise
+from elasticity import elasticity
+from results_grid import show_grid
+from change_orders import load_baseline, change_between, change_order_deltas
+from version_history import VersionHistory
+from result_cache import shared_cache, canonical_inputs, cache_key
+from simulation import SWEEP_FIELDS, combine_chunks, percentiles, histogram
+from worker_pool import WorkerPool, monte_carlo_job, sweep_job, SWEEP_CHUNK
+from pricing_matrix import REGIONS, fx_versions, load_fx_table, format_money, estimate_price_matrix, portfolio_price_matrix
 
 # ============ PAGE CONFIG ============
 st.set_page_config(
@@ -626,143 +649,97 @@ code {
 </style>
 """, unsafe_allow_html=True)
 
-# ============ ORIGINAL CONSTANTS & CALCULATIONS ============
-MEETINGS_RATE = 800
-MEETINGS_COUNT = 4
-MEETINGS_HRS = 1.5
-MODELLING_PERCENT = 0.30
-MODELLING_RATE = 1200
-
-PROJECT_FACTORS = {
-    'Commercial': 0.85, 'Industrial': 1.10, 'Pharma': 1.20,
-    'Hospital': 1.25, 'Metro/Infrastructure': 1.30, 'Oil & Gas': 1.40, 'Business Park': 0.80
-}
-
-VOLTAGE_FACTORS = {'11': 1.00, '33': 1.15, '66': 1.30, '132': 1.50, '220': 1.75}
-REGION_FACTORS = {'Domestic': 1.00, 'SouthAsia': 1.05, 'SeAsia': 1.35, 'MiddleEast': 1.75, 'APAC': 1.55, 'Europe': 2.00}
-
-DEFAULT_STUDIES = {
-    'lf': {'name': 'Load Flow', 'baseHrs': 15, 'complexity': 1.0},
-    'sc': {'name': 'Short Circuit', 'baseHrs': 18, 'complexity': 1.1},
-    'pdc': {'name': 'Protection Coordination', 'baseHrs': 25, 'complexity': 1.3},
-    'af': {'name': 'Arc Flash', 'baseHrs': 16, 'complexity': 1.0},
-    'har': {'name': 'Harmonics', 'baseHrs': 22, 'complexity': 1.2},
-    'ts': {'name': 'Transient Stability', 'baseHrs': 30, 'complexity': 1.4},
-    'ms': {'name': 'Motor Starting', 'baseHrs': 18, 'complexity': 1.05}
-}
-
-DEFAULT_TEAM = {
-    'L1': {'rate': 2400, 'allocation': 0.15},
-    'L2': {'rate': 1200, 'allocation': 0.35},
-    'L3': {'rate': 900, 'allocation': 0.50}
-}
-
-# ============ HELPER FUNCTIONS ============
-def format_currency(amount):
-    return f"₹{amount:,.0f}"
-
-def format_number(num):
-    return f"{num:,.1f}"
-
-# ============ ORIGINAL CALCULATE FUNCTION ============
-def calculateAll(facility_mw, mv_buses, lv_buses, project_type, voltage, region,
-                mw_exponent, bus_exponent, bus_confidence, buffer_percent,
-                report_mode, report_percent, report_fixed, report_complexity,
-                custom_studies, custom_team, selected_studies):
-    
-    total_buses = mv_buses + lv_buses
-    mw_per_bus = facility_mw / total_buses
-    
-    # Calculate factors
-    mw_factor = pow(facility_mw / 10, mw_exponent)
-    bus_factor = pow(total_buses / 32, bus_exponent)
-    project_factor = PROJECT_FACTORS.get(project_type, 1.0)
-    voltage_factor = VOLTAGE_FACTORS.get(voltage, 1.0)
-    region_factor = REGION_FACTORS.get(region, 1.0)
-    
-    # Calculate studies
-    study_results = []
-    total_study_hours = 0
-    total_report_hours = 0
-    total_study_cost = 0
-    
-    for code in selected_studies:
-        if code not in DEFAULT_STUDIES:
-            continue
-        
-        study = DEFAULT_STUDIES[code]
-        base_hrs = custom_studies[code]['baseHrs']
-        complexity = custom_studies[code]['complexity']
-        
-        adjusted_study_hrs = base_hrs * pow(total_buses / 32, bus_exponent) * pow(facility_mw / 10, mw_exponent)
-        all_factors = project_factor * voltage_factor * region_factor * bus_confidence * complexity
-        final_study_hrs = adjusted_study_hrs * all_factors
-        
-        # Team allocation for this study
-        l1_hours = final_study_hrs * custom_team['L1']['allocation']
-        l2_hours = final_study_hrs * custom_team['L2']['allocation']
-        l3_hours = final_study_hrs * custom_team['L3']['allocation']
-        
-        blended_rate = (l1_hours * custom_team['L1']['rate'] + 
-                       l2_hours * custom_team['L2']['rate'] + 
-                       l3_hours * custom_team['L3']['rate']) / final_study_hrs if final_study_hrs > 0 else 0
-        
-        study_cost = final_study_hrs * blended_rate
-        
-        # Reporting
-        report_hrs = 0
-        if report_mode == "% of Study Cost":
-            report_pct = report_percent / 100
-            report_hrs = final_study_hrs * report_pct
-        
-        total_study_hours += final_study_hrs
-        total_report_hours += report_hrs
-        total_study_cost += study_cost
-        
-        study_results.append({
-            'name': study['name'],
-            'studyHrs': final_study_hrs,
-            'reportHrs': report_hrs,
-            'studyCost': study_cost,
-            'reportCost': report_hrs * blended_rate * report_complexity
-        })
-    
-    # Reporting cost
-    total_reporting_cost = 0
-    if report_mode == "% of Study Cost":
-        total_reporting_cost = total_report_hours * 1200 * report_complexity
+# ============ CACHED COMPUTATIONS ============
+# Estimates, sensitivities and price matrices are shared by every session in
+# the process and persisted next to the app so they survive restarts
+SHARED_CACHE = shared_cache(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.estimator_cache.sqlite'))
+
+@st.cache_resource(show_spinner="Evaluating portfolio...")
+def evaluate_portfolio_file(data, file_name):
+    return evaluate_portfolio(load_portfolio(io.BytesIO(data), file_name), exact_money=True)
+
+@st.cache_resource(show_spinner="Sequencing studies...")
+def portfolio_staffing_file(data, file_name):
+    return portfolio_staffing(evaluate_portfolio_file(data, file_name))
+
+@st.cache_data(show_spinner="Scheduling studies...")
+def schedule_portfolio_plan(portfolio_id, _portfolio, roster_data, projects):
+    # The event loop is pure Python, so a plan is computed once per
+    # (portfolio, roster, projects) rather than on every rerun
+    return schedule_portfolio(_portfolio.loc[list(projects)], load_roster(io.BytesIO(roster_data)))
+
+@st.cache_data(show_spinner="Parsing network model...")
+def import_network_file(data, file_name):
+    return import_network(data, file_name)
+
+@st.cache_resource(show_spinner="Loading bus table...")
+def load_bus_table_file(data):
+    return load_bus_table(io.BytesIO(data))
+
+@st.cache_resource(show_spinner=False)
+def get_worker_pool():
+    return WorkerPool()
+
+# ============ UI CALLBACKS ============
+def apply_network_import(summary):
+    st.session_state.mv_buses = min(max(summary['mv_buses'], 1), 200)
+    st.session_state.lv_buses = min(max(summary['lv_buses'], 1), 300)
+    st.session_state.voltage = summary['voltage']
+
+WIDGET_FIELDS = [field for field in INPUT_FIELDS if field not in ('custom_studies', 'custom_team', 'selected_studies')]
+
+def restore_inputs(inputs):
+    for field in WIDGET_FIELDS:
+        st.session_state[field] = inputs[field]
+    st.session_state.custom_studies = inputs['custom_studies']
+    st.session_state.custom_team = inputs['custom_team']
+    st.session_state.study_selection = set(inputs['selected_studies'])
+    # Per-study and per-level widgets re-initialise from the restored dicts
+    for key in [key for key in st.session_state if key.startswith(('hrs_', 'cplx_', 'alloc_', 'chk_'))]:
+        del st.session_state[key]
+
+def undo_inputs():
+    restore_inputs(st.session_state.history.undo())
+
+def redo_inputs():
+    restore_inputs(st.session_state.history.redo())
+
+def restore_version():
+    restore_inputs(st.session_state.history.restore(st.session_state.compare_version))
+
+def follow_job(name, key, render):
+    # One live job per name and session. A job started for other inputs is
+    # cancelled; a rerun mid-job replays the finished chunks and keeps streaming
+    active = st.session_state.get(name)
+    if active is not None and active['key'] != key:
+        active['job'].cancel()
+        st.session_state[name] = active = None
+    if active is None:
+        return
+    job = active['job']
+    progress = st.progress(0.0)
+    output = st.empty()
+    partials = {}
+    for index, partial in job.stream():
+        partials[index] = partial
+        progress.progress(len(partials) / job.chunks, text=f"{len(partials)} of {job.chunks} chunks")
+        with output.container():
+            render(partials)
+
+def prepare_price_export(export_key, frame_source, fx_version, regions, currencies):
+    # Built only on request: a full portfolio export can run to hundreds of MB
+    frame = frame_source()
+    csv_data = portfolio_price_matrix(frame, load_fx_table(fx_version), regions, currencies).to_csv(index=False)
+    st.session_state.price_export = {'key': export_key, 'data': csv_data.encode('utf-8')}
+
+def clear_price_export():
+    st.session_state.price_export = None
+
+def toggle_study(code):
+    if st.session_state[f"chk_{code}"]:
+        st.session_state.study_selection.add(code)
     else:
-        total_reporting_cost = report_fixed * (len(selected_studies) / 7)
-    
-    # Additional costs
-    total_project_hours = total_study_hours + total_report_hours + (MEETINGS_COUNT * MEETINGS_HRS)
-    meetings_cost = MEETINGS_COUNT * MEETINGS_HRS * MEETINGS_RATE
-    modelling_hours = total_project_hours * MODELLING_PERCENT
-    modelling_cost = modelling_hours * MODELLING_RATE
-    
-    # Final costs
-    subtotal = total_study_cost + total_reporting_cost + meetings_cost + modelling_cost
-    buffer = subtotal * (buffer_percent / 100)
-    grand_total = subtotal + buffer
-    
-    cost_per_bus = grand_total / total_buses if total_buses > 0 else 0
-    
-    return {
-        'total_buses': total_buses,
-        'mw_per_bus': mw_per_bus,
-        'total_study_hours': total_study_hours,
-        'total_report_hours': total_report_hours,
-        'total_project_hours': total_project_hours,
-        'total_study_cost': total_study_cost,
-        'total_reporting_cost': total_reporting_cost,
-        'meetings_cost': meetings_cost,
-        'modelling_cost': modelling_cost,
-        'subtotal': subtotal,
-        'buffer': buffer,
-        'grand_total': grand_total,
-        'cost_per_bus': cost_per_bus,
-        'study_results': study_results
-    }
+        st.session_state.study_selection.discard(code)
 
 # ============ HEADER ============
 st.markdown("""
@@ -784,10 +761,20 @@ st.markdown("""
 
 # ============ SESSION STATE ============
 if 'custom_studies' not in st.session_state:
-    st.session_state.custom_studies = {code: {'baseHrs': study['baseHrs'], 'complexity': study['complexity']} 
-                                       for code, study in DEFAULT_STUDIES.items()}
+    st.session_state.custom_studies = {}
+for code, study in DEFAULT_STUDIES.items():
+    st.session_state.custom_studies.setdefault(code, {'baseHrs': study['baseHrs'], 'complexity': study['complexity']})
+if 'study_selection' not in st.session_state:
+    st.session_state.study_selection = set(DEFAULT_SELECTION)
 if 'custom_team' not in st.session_state:
-    st.session_state.custom_team = DEFAULT_TEAM.copy()
+    st.session_state.custom_team = {level: dict(team) for level, team in DEFAULT_TEAM.items()}
+if 'scenarios' not in st.session_state:
+    st.session_state.scenarios = {}
+if 'history' not in st.session_state:
+    st.session_state.history = VersionHistory()
+for field, value in default_inputs().items():
+    if field in WIDGET_FIELDS:
+        st.session_state.setdefault(field, value)
 
 # ============ SECTION 1: PROJECT BASICS & CONFIGURATION ============
 st.markdown('<div class="section-title"><span class="section-icon">📋</span> Project Parameters</div>', unsafe_allow_html=True)
@@ -796,45 +783,64 @@ col_left, col_right = st.columns(2, gap="large")
 
 with col_left:
     st.markdown('<div class="card-premium"><div class="card-content">', unsafe_allow_html=True)
-    facility_mw = st.number_input("🔌 Facility Capacity (MW)", value=10.0, min_value=0.5, max_value=500.0, step=0.5)
+    facility_mw = st.number_input("🔌 Facility Capacity (MW)", min_value=0.5, max_value=500.0, step=0.5, key="facility_mw")
     col_mv, col_lv = st.columns(2)
     with col_mv:
-        mv_buses = st.number_input("MV Buses", value=24, min_value=1, max_value=200)
+        mv_buses = st.number_input("MV Buses", min_value=1, max_value=200, key="mv_buses")
     with col_lv:
-        lv_buses = st.number_input("LV Buses", value=54, min_value=1, max_value=300)
+        lv_buses = st.number_input("LV Buses", min_value=1, max_value=300, key="lv_buses")
+    with st.expander("📂 Import Bus Counts from Network Model"):
+        network_file = st.file_uploader("PSS/E RAW or Bus List CSV", type=['raw', 'csv'])
+        if network_file is not None:
+            try:
+                network = import_network_file(network_file.getvalue(), network_file.name)
+            except ValueError as exc:
+                st.error(f"⚠️ Could not import network model: {exc}")
+            else:
+                st.caption(f"{network['mv_buses']:,} MV + {network['lv_buses']:,} LV buses · "
+                           f"highest {network['max_kv']:g} kV → {network['voltage']} kV class")
+                if network['mv_buses'] > 200 or network['lv_buses'] > 300:
+                    st.warning("⚠️ Bus counts exceed the form limits and will be capped when applied")
+                st.button("✓ Apply to Form", on_click=apply_network_import, args=(network,), use_container_width=True)
     st.markdown('</div></div>', unsafe_allow_html=True)
 
 with col_right:
     st.markdown('<div class="card-premium"><div class="card-content">', unsafe_allow_html=True)
-    project_type = st.selectbox("🏢 Project Type", list(PROJECT_FACTORS.keys()), index=0)
-    voltage = st.selectbox("⚡ Highest Voltage (kV)", list(VOLTAGE_FACTORS.keys()), index=1)
-    region = st.selectbox("🌍 Region", list(REGION_FACTORS.keys()), index=0)
+    project_type = st.selectbox("🏢 Project Type", list(PROJECT_FACTORS.keys()), key="project_type")
+    voltage = st.selectbox("⚡ Highest Voltage (kV)", list(VOLTAGE_FACTORS.keys()), key="voltage")
+    region = st.selectbox("🌍 Region", list(REGION_FACTORS.keys()), key="region")
     st.markdown('</div></div>', unsafe_allow_html=True)
 
 # ============ SECTION 2: STUDIES SELECTION ============
 st.markdown('<div class="section-title"><span class="section-icon">✓</span> Studies to Include</div>', unsafe_allow_html=True)
 st.markdown('<div class="card-premium"><div class="card-content">', unsafe_allow_html=True)
 
-col1, col2 = st.columns(2)
-with col1:
-    chk_lf = st.checkbox("📊 Load Flow", value=True)
-    chk_sc = st.checkbox("⚠️ Short Circuit", value=True)
-    chk_pdc = st.checkbox("🔒 Protection Coordination", value=True)
-    chk_af = st.checkbox("🔥 Arc Flash", value=True)
+STUDIES_PER_PAGE = 8
 
-with col2:
-    chk_har = st.checkbox("〰️ Harmonics", value=False)
-    chk_ts = st.checkbox("📈 Transient Stability", value=False)
-    chk_ms = st.checkbox("⚙️ Motor Starting", value=False)
-
-selected_studies = []
-if chk_lf: selected_studies.append('lf')
-if chk_sc: selected_studies.append('sc')
-if chk_pdc: selected_studies.append('pdc')
-if chk_af: selected_studies.append('af')
-if chk_har: selected_studies.append('har')
-if chk_ts: selected_studies.append('ts')
-if chk_ms: selected_studies.append('ms')
+col_search, col_category = st.columns([2, 1])
+with col_search:
+    study_query = st.text_input("🔍 Search Studies", placeholder="e.g. arc, relay, EMT")
+with col_category:
+    study_category = st.selectbox("Category", ["All"] + STUDY_CATEGORIES)
+
+# Only the visible page of the catalog gets widgets
+matching_studies = filter_studies(study_query, None if study_category == "All" else study_category)
+page_count = max(-(-len(matching_studies) // STUDIES_PER_PAGE), 1)
+study_page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1) if page_count > 1 else 1
+page_studies = matching_studies[(study_page - 1) * STUDIES_PER_PAGE:study_page * STUDIES_PER_PAGE]
+
+col1, col2 = st.columns(2)
+for i, code in enumerate(page_studies):
+    with col1 if i < (len(page_studies) + 1) // 2 else col2:
+        st.checkbox(f"{STUDY_CATALOG[code]['icon']} {STUDY_CATALOG[code]['name']}",
+                    value=code in st.session_state.study_selection, key=f"chk_{code}",
+                    on_change=toggle_study, args=(code,))
+if not matching_studies:
+    st.caption("No studies match the search")
+
+selected_studies = [code for code in STUDY_CODES if code in st.session_state.study_selection]
+st.caption(f"**{len(selected_studies)} of {len(STUDY_CODES)} selected:** " +
+           ", ".join(DEFAULT_STUDIES[code]['name'] for code in selected_studies))
 
 col_calc, col_reset = st.columns(2)
 with col_calc:
@@ -854,33 +860,33 @@ st.markdown('<div class="card-premium"><div class="card-content">', unsafe_allow
 with st.expander("▼ Scaling Factors", expanded=True):
     col1, col2 = st.columns(2)
     with col1:
-        mw_exponent = st.slider("🔋 MW Exponent (0.5 - 1.2)", 0.5, 1.2, 0.8, 0.05)
+        mw_exponent = st.slider("🔋 MW Exponent (0.5 - 1.2)", 0.5, 1.2, step=0.05, key="mw_exponent")
     with col2:
-        bus_exponent = st.slider("📍 Bus Exponent (0.7 - 1.3)", 0.7, 1.3, 0.9, 0.05)
+        bus_exponent = st.slider("📍 Bus Exponent (0.7 - 1.3)", 0.7, 1.3, step=0.05, key="bus_exponent")
 
 with st.expander("▼ Base Hours per Study"):
-    for code in DEFAULT_STUDIES.keys():
+    for code in selected_studies:
         custom_hrs = st.number_input(f"{DEFAULT_STUDIES[code]['name']} Base Hours",
                                      value=st.session_state.custom_studies[code]['baseHrs'],
                                      min_value=5, max_value=50, step=1, key=f"hrs_{code}")
         st.session_state.custom_studies[code]['baseHrs'] = custom_hrs
 
 with st.expander("▼ Complexity Factors"):
-    for code in DEFAULT_STUDIES.keys():
+    for code in selected_studies:
         complexity = st.slider(f"{DEFAULT_STUDIES[code]['name']} Complexity",
                               0.5, 2.0, st.session_state.custom_studies[code]['complexity'], 0.05,
                               key=f"cplx_{code}")
         st.session_state.custom_studies[code]['complexity'] = complexity
 
 with st.expander("▼ Reporting Configuration"):
-    report_mode = st.radio("Reporting Cost Mode", ["% of Study Cost", "Fixed Amount ₹"], horizontal=True)
+    report_mode = st.radio("Reporting Cost Mode", ["% of Study Cost", "Fixed Amount ₹"], horizontal=True, key="report_mode")
     if report_mode == "% of Study Cost":
-        report_percent = st.slider("Report Cost %", 10, 50, 35, 5)
+        report_percent = st.slider("Report Cost %", 10, 50, step=5, key="report_percent")
         report_fixed = 30000
     else:
-        report_fixed = st.number_input("Fixed Cost (₹)", value=30000, min_value=5000, max_value=100000, step=5000)
+        report_fixed = st.number_input("Fixed Cost (₹)", min_value=5000, max_value=100000, step=5000, key="report_fixed")
         report_percent = 35
-    report_complexity = st.slider("Report Complexity Factor", 0.8, 1.5, 1.0, 0.1)
+    report_complexity = st.slider("Report Complexity Factor", 0.8, 1.5, step=0.1, key="report_complexity")
 
 with st.expander("▼ Team Cost Allocation"):
     for level in DEFAULT_TEAM.keys():
@@ -895,24 +901,72 @@ with st.expander("▼ Team Cost Allocation"):
             min_alloc = 5 if level == 'L1' else (20 if level == 'L2' else 30)
             max_alloc = 25 if level == 'L1' else (50 if level == 'L2' else 70)
             alloc = st.slider(f"{level} Allocation %", min_alloc, max_alloc,
-                             int(st.session_state.custom_team[level]['allocation']*100), 1, key=f"alloc_{level}")
+                             round(st.session_state.custom_team[level]['allocation'] * 100), 1, key=f"alloc_{level}")
             st.session_state.custom_team[level]['allocation'] = alloc / 100
 
 with st.expander("▼ Confidence & Buffers"):
     col1, col2 = st.columns(2)
     with col1:
-        bus_confidence = st.slider("📊 Bus Confidence Level", 0.9, 2.5, 1.0, 0.1)
+        bus_confidence = st.slider("📊 Bus Confidence Level", 0.9, 2.5, step=0.1, key="bus_confidence")
     with col2:
-        buffer_percent = st.slider("📈 Contingency Buffer %", 5, 25, 15, 1)
+        buffer_percent = st.slider("📈 Contingency Buffer %", 5, 25, step=1, key="buffer_percent")
+
+with st.expander("▼ Granular Bus Model"):
+    st.caption("Per-bus table with columns kv (or base_kv, nominal_kv, ...), devices, motor_kw. "
+               "Bus counts are taken from the table.")
+    bus_table_file = st.file_uploader("Bus Table CSV", type=['csv'])
+    bus_table = None
+    if bus_table_file is not None:
+        try:
+            bus_table = load_bus_table_file(bus_table_file.getvalue())
+        except ValueError as exc:
+            st.error(f"⚠️ Could not load bus table: {exc}")
+    granular_mode = st.toggle("Use per-bus effort weights", value=False, disabled=bus_table is None)
 
 st.markdown('</div></div>', unsafe_allow_html=True)
 
+current_inputs = {
+    'facility_mw': facility_mw, 'mv_buses': mv_buses, 'lv_buses': lv_buses,
+    'project_type': project_type, 'voltage': voltage, 'region': region,
+    'mw_exponent': mw_exponent, 'bus_exponent': bus_exponent,
+    'bus_confidence': bus_confidence, 'buffer_percent': buffer_percent,
+    'report_mode': report_mode, 'report_percent': report_percent,
+    'report_fixed': report_fixed, 'report_complexity': report_complexity,
+    'custom_studies': st.session_state.custom_studies, 'custom_team': st.session_state.custom_team,
+    'selected_studies': selected_studies
+}
+st.session_state.history.commit(current_inputs)
+
+# ============ VERSION HISTORY ============
+history = st.session_state.history
+col_undo, col_redo, col_version = st.columns([1, 1, 2])
+with col_undo:
+    st.button("↶ Undo", on_click=undo_inputs, disabled=not history.can_undo(), use_container_width=True)
+with col_redo:
+    st.button("↷ Redo", on_click=redo_inputs, disabled=not history.can_redo(), use_container_width=True)
+with col_version:
+    st.caption(f"🕘 Version {history.current} of {len(history)}")
+
+with st.expander("▼ Compare & Restore Versions"):
+    compare_version = st.selectbox("Compare With Version", list(range(len(history), 0, -1)), key="compare_version")
+    version_diff = history.diff(compare_version)
+    if version_diff:
+        st.dataframe(pd.DataFrame([{'Field': field, f'Version {compare_version}': str(old), 'Current': str(new)}
+                                   for field, (old, new) in sorted(version_diff.items())]),
+                     use_container_width=True, hide_index=True)
+    else:
+        st.caption("No differences from the current inputs")
+    st.button(f"⟲ Restore Version {compare_version}", on_click=restore_version,
+              disabled=compare_version == history.current)
+
 # ============ SECTION 4: RESULTS & ANALYTICS ============
 if len(selected_studies) > 0:
-    results = calculateAll(facility_mw, mv_buses, lv_buses, project_type, voltage, region,
-                          mw_exponent, bus_exponent, bus_confidence, buffer_percent,
-                          report_mode, report_percent, report_fixed, report_complexity,
-                          st.session_state.custom_studies, st.session_state.custom_team, selected_studies)
+    cache_inputs = canonical_inputs(current_inputs)
+    if granular_mode and bus_table is not None:
+        results = calculate_granular(current_inputs, bus_table)
+    else:
+        results = SHARED_CACHE.get_or_compute(
+            'estimate', cache_inputs, lambda: calculateAll(*(current_inputs[field] for field in INPUT_FIELDS)))
     
     # KPI METRICS
     st.markdown('<div class="section-title"><span class="section-icon">💰</span> Cost Estimation Results</div>', unsafe_allow_html=True)
@@ -941,40 +995,16 @@ if len(selected_studies) > 0:
     st.markdown('<div class="section-title"><span class="section-icon">📍</span> Per-Bus Cost Breakdown</div>', unsafe_allow_html=True)
     st.markdown('<div class="card-premium">', unsafe_allow_html=True)
     
-    breakdown_data = [
-        {
-            'Component': 'Studies',
-            'Total Cost': format_currency(results['total_study_cost']),
-            'Cost Per Bus': format_currency(results['total_study_cost']/results['total_buses']),
-            '% of Total': f"{(results['total_study_cost']/results['grand_total']*100):.1f}%"
-        },
-        {
-            'Component': 'Reporting',
-            'Total Cost': format_currency(results['total_reporting_cost']),
-            'Cost Per Bus': format_currency(results['total_reporting_cost']/results['total_buses']),
-            '% of Total': f"{(results['total_reporting_cost']/results['grand_total']*100):.1f}%"
-        },
-        {
-            'Component': 'Modelling (30%)',
-            'Total Cost': format_currency(results['modelling_cost']),
-            'Cost Per Bus': format_currency(results['modelling_cost']/results['total_buses']),
-            '% of Total': f"{(results['modelling_cost']/results['grand_total']*100):.1f}%"
-        },
-        {
-            'Component': 'Meetings',
-            'Total Cost': format_currency(results['meetings_cost']),
-            'Cost Per Bus': format_currency(results['meetings_cost']/results['total_buses']),
-            '% of Total': f"{(results['meetings_cost']/results['grand_total']*100):.1f}%"
-        },
-        {
-            'Component': 'Buffer',
-            'Total Cost': format_currency(results['buffer']),
-            'Cost Per Bus': format_currency(results['buffer']/results['total_buses']),
-            '% of Total': f"{(results['buffer']/results['grand_total']*100):.1f}%"
-        },
-    ]
+    breakdown_df = pd.DataFrame({
+        'Component': ['Studies', 'Reporting', 'Modelling (30%)', 'Meetings', 'Buffer'],
+        'Total Cost': [results['total_study_cost'], results['total_reporting_cost'],
+                       results['modelling_cost'], results['meetings_cost'], results['buffer']]
+    })
+    breakdown_df['Cost Per Bus'] = breakdown_df['Total Cost'] / results['total_buses']
+    breakdown_df['% of Total'] = breakdown_df['Total Cost'] / results['grand_total'] * 100
     
-    st.dataframe(pd.DataFrame(breakdown_data), use_container_width=True)
+    show_grid(breakdown_df, {'Total Cost': 'currency', 'Cost Per Bus': 'currency', '% of Total': 'percent'},
+              key="breakdown")
     st.markdown('</div>', unsafe_allow_html=True)
     
     st.info("ℹ️ **Reporting cost calculated separately. All costs include:** Study + Reporting + Modelling ÷ Buses")
@@ -983,20 +1013,21 @@ if len(selected_studies) > 0:
     st.markdown('<div class="section-title"><span class="section-icon">📊</span> Studies Breakdown</div>', unsafe_allow_html=True)
     st.markdown('<div class="card-premium">', unsafe_allow_html=True)
     
-    studies_df = pd.DataFrame([
-        {
-            'Study': s['name'],
-            'Study Hrs': format_number(s['studyHrs']),
-            'Report Hrs': format_number(s['reportHrs']),
-            'Total Hrs': format_number(s['studyHrs'] + s['reportHrs']),
-            'Study Cost': format_currency(s['studyCost']),
-            'Report Cost': format_currency(s['reportCost']),
-            'Total': format_currency(s['studyCost'] + s['reportCost'])
-        }
-        for s in results['study_results']
-    ])
+    studies_df = pd.DataFrame(results['study_results'], columns=['name', 'studyHrs', 'reportHrs', 'studyCost', 'reportCost'])
+    studies_df.columns = ['Study', 'Study Hrs', 'Report Hrs', 'Study Cost', 'Report Cost']
+    studies_df.insert(3, 'Total Hrs', studies_df['Study Hrs'] + studies_df['Report Hrs'])
+    studies_df['Total'] = studies_df['Study Cost'] + studies_df['Report Cost']
+    
+    show_grid(studies_df, {'Study Hrs': 'number', 'Report Hrs': 'number', 'Total Hrs': 'number',
+                           'Study Cost': 'currency', 'Report Cost': 'currency', 'Total': 'currency'},
+              key="studies")
     
-    st.dataframe(studies_df, use_container_width=True)
+    with st.expander("▼ Parameter Sensitivity"):
+        st.caption("% change in Grand Total for a 1% change in each input")
+        sensitivity = SHARED_CACHE.get_or_compute(
+            'sensitivity', cache_inputs, lambda: elasticity(pack_inputs([current_inputs]))['grand_total'].iloc[0])
+        sensitivity = sensitivity[sensitivity != 0].sort_values(key=abs, ascending=False)
+        show_grid(sensitivity.rename('Elasticity').to_frame(), {'Elasticity': 'signed'}, key="sensitivity")
     st.markdown('</div>', unsafe_allow_html=True)
     
     # CONTRACTUAL PRICING
@@ -1012,6 +1043,20 @@ if len(selected_studies) > 0:
     with col4:
         st.metric("Total Revenue", format_currency(results['cost_per_bus'] * 1.20 * results['total_buses']))
     
+    with st.expander("▼ Region × Currency Pricing"):
+        col1, col2 = st.columns(2)
+        with col1:
+            fx_version = st.selectbox("FX Table Version", fx_versions(), key="fx_version")
+        with col2:
+            matrix_metric = st.radio("Metric", ["Grand Total", "Cost Per Bus"], horizontal=True, key="fx_metric")
+        fx = load_fx_table(fx_version)
+        st.caption(f"Rates as of {fx['as_of']} · study hours scaled by each region's factor")
+        matrix = SHARED_CACHE.get_or_compute('price_matrix', [cache_inputs, fx_version],
+                                             lambda: estimate_price_matrix(current_inputs, fx))
+        matrix = matrix['grand_total' if matrix_metric == "Grand Total" else 'cost_per_bus']
+        show_grid(matrix, {code: lambda value, code=code: format_money(value, code, fx) for code in fx['currencies']},
+                  key="price_matrix")
+    
     # EXPORT
     st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
     st.markdown('<div class="section-title"><span class="section-icon">📥</span> Export & Download</div>', unsafe_allow_html=True)
@@ -1022,7 +1067,8 @@ if len(selected_studies) > 0:
     export_data = {
         'timestamp': datetime.now().isoformat(),
         'grandTotal': results['grand_total'],
-        'costPerBus': results['cost_per_bus']
+        'costPerBus': results['cost_per_bus'],
+        'inputs': current_inputs
     }
     
     with col1:
@@ -1041,11 +1087,232 @@ if len(selected_studies) > 0:
         if st.button("↻ Start Over", use_container_width=True):
             st.rerun()
     
+    with st.expander("▼ Change Order vs Stored Baseline"):
+        baseline_file = st.file_uploader("Baseline Estimate (JSON export)", type=['json'])
+        if baseline_file is not None:
+            try:
+                baseline = load_baseline(json.loads(baseline_file.getvalue()))
+            except ValueError as exc:
+                st.error(f"⚠️ Could not load baseline: {exc}")
+            else:
+                component_delta, study_delta = change_order_deltas(
+                    baseline, [change_between(baseline['inputs'], current_inputs)], labels=["Current vs Baseline"])
+                show_grid(component_delta.T, {"Current vs Baseline": 'currency'}, key="change_components")
+                show_grid(study_delta.T, {"Current vs Baseline": 'currency'}, key="change_studies")
+    
     st.markdown('</div></div>', unsafe_allow_html=True)
 
 else:
     st.info("👈 **Please select at least one study to calculate costs**")
 
+# ============ SECTION 5: SCENARIO COMPARISON ============
+st.markdown('<div class="section-title"><span class="section-icon">🧮</span> Scenario Comparison</div>', unsafe_allow_html=True)
+st.markdown('<div class="card-premium"><div class="card-content">', unsafe_allow_html=True)
+
+col1, col2, col3 = st.columns([2, 1, 1])
+with col1:
+    scenario_name = st.text_input("Scenario Name", value=f"Scenario {len(st.session_state.scenarios) + 1}")
+with col2:
+    if st.button("➕ Save Current Inputs", use_container_width=True, disabled=len(selected_studies) == 0):
+        add_scenario(st.session_state.scenarios, scenario_name, current_inputs)
+with col3:
+    if st.button("🗑️ Clear Scenarios", use_container_width=True):
+        st.session_state.scenarios = {}
+
+scenario_names, scenario_batch = evaluate_scenarios(st.session_state.scenarios)
+if scenario_batch is not None:
+    st.caption(f"Δ columns compare each scenario against **{scenario_names[0]}**")
+    component_df = component_delta_table(scenario_names, scenario_batch).set_index('Component')
+    study_df = study_delta_table(scenario_names, scenario_batch).set_index('Study')
+    show_grid(component_df, dict.fromkeys(component_df.columns, 'currency'), key="scenario_components",
+              row_formats={'Total Hours': 'number'})
+    show_grid(study_df, dict.fromkeys(study_df.columns, 'currency'), key="scenario_studies")
+else:
+    st.info("💡 Save the current inputs as a scenario to compare variants side by side")
+
+st.markdown('</div></div>', unsafe_allow_html=True)
+
+# ============ SECTION 6: PORTFOLIO DASHBOARD ============
+st.markdown('<div class="section-title"><span class="section-icon">🗂️</span> Portfolio Dashboard</div>', unsafe_allow_html=True)
+st.markdown('<div class="card-premium"><div class="card-content">', unsafe_allow_html=True)
+
+portfolio_file = st.file_uploader("Estimates File (CSV / Parquet / JSON)", type=['csv', 'parquet', 'json'])
+if portfolio_file is not None:
+    portfolio = evaluate_portfolio_file(portfolio_file.getvalue(), portfolio_file.name)
+elif st.session_state.scenarios:
+    portfolio = evaluate_portfolio(inputs_to_frame(list(st.session_state.scenarios.values()),
+                                                   labels={'scenario': list(st.session_state.scenarios.keys())}),
+                                   exact_money=True)
+else:
+    portfolio = None
+
+if portfolio is not None:
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Estimates", f"{len(portfolio):,}")
+    with col2:
+        st.metric("Total Hours", format_number(portfolio['total_project_hours'].sum()))
+    with col3:
+        st.metric("Portfolio Value", format_paise(portfolio['grand_total_paise'].sum()))
+    with col4:
+        st.metric("Avg Cost/Bus", format_currency(portfolio['grand_total'].sum() / portfolio['total_buses'].sum()))
+    
+    group_by = st.multiselect("Group By", ['region', 'project_type', 'voltage'], default=['region'])
+    metric = st.selectbox("Chart Metric", ROLLUP_METRICS, index=ROLLUP_METRICS.index('grand_total'))
+    if group_by:
+        summary = rollup(portfolio, group_by)
+        st.bar_chart(summary[metric])
+        show_grid(summary, {column: 'number' if column.endswith('hours') else 'currency' for column in summary.columns
+                            if not column.endswith('_paise')}, key="portfolio_rollup")
+    
+    with st.expander("▼ All Estimates"):
+        show_grid(portfolio, {'total_project_hours': 'number', 'grand_total': 'currency', 'cost_per_bus': 'currency',
+                              'total_study_cost': 'currency', 'total_reporting_cost': 'currency'},
+                  key="portfolio_estimates")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.bar_chart(study_hours_by_type(portfolio))
+    with col2:
+        st.bar_chart(level_hour_demand(portfolio))
+    
+    st.markdown("**Weekly Staffing Demand (hrs)** — studies sequenced from each estimate's `start_date`")
+    if portfolio_file is not None:
+        st.area_chart(portfolio_staffing_file(portfolio_file.getvalue(), portfolio_file.name))
+    else:
+        st.area_chart(portfolio_staffing(portfolio))
+    
+    with st.expander("▼ Region × Currency Export"):
+        col1, col2, col3 = st.columns([1, 2, 2])
+        with col1:
+            export_fx = st.selectbox("FX Table Version", fx_versions(), key="portfolio_fx_version")
+        with col2:
+            export_regions = st.multiselect("Regions", REGIONS, default=REGIONS)
+        with col3:
+            export_currencies = st.multiselect("Currencies", load_fx_table(export_fx)['currencies'], default=['INR', 'USD'])
+        if export_regions and export_currencies:
+            if portfolio_file is not None:
+                source_id = [portfolio_file.name, portfolio_file.size]
+                frame_source = lambda: load_portfolio(io.BytesIO(portfolio_file.getvalue()), portfolio_file.name)
+            else:
+                source_id = list(st.session_state.scenarios.keys())
+                frame_source = lambda: inputs_to_frame(list(st.session_state.scenarios.values()),
+                                                       labels={'scenario': list(st.session_state.scenarios.keys())})
+            export_key = cache_key('price_export', [source_id, export_fx, export_regions, export_currencies])
+            prepared = st.session_state.get('price_export')
+            if prepared is not None and prepared['key'] == export_key:
+                # Dropped once downloaded so later reruns do not re-send it
+                st.download_button("📊 Price Matrix CSV", prepared['data'], file_name=f"price-matrix-{export_fx}.csv",
+                                   mime="text/csv", on_click=clear_price_export, use_container_width=True)
+            else:
+                st.button("⚙️ Prepare Export", on_click=prepare_price_export, use_container_width=True,
+                          args=(export_key, frame_source, export_fx, export_regions, export_currencies))
+    
+    with st.expander("▼ Finite-Capacity Schedule"):
+        st.caption("Roster CSV with columns name, level (L1/L2/L3), hours_per_week, available_from. "
+                   "Only awarded estimates are scheduled: those with status awarded, or the ones picked below.")
+        roster_file = st.file_uploader("Engineer Roster", type=['csv'])
+        awarded = awarded_projects(portfolio)
+        if awarded is not None:
+            projects = list(awarded)
+            st.caption(f"{len(projects):,} of {len(portfolio):,} estimates awarded")
+        else:
+            names = portfolio['scenario'] if 'scenario' in portfolio else None
+            projects = st.multiselect("Awarded Estimates", list(portfolio.index), key="schedule_projects",
+                                      format_func=lambda i: str(names[i]) if names is not None else f"Row {i + 1}")
+        if roster_file is not None and projects:
+            if portfolio_file is not None:
+                portfolio_id = [portfolio_file.name, portfolio_file.getvalue()]
+            else:
+                portfolio_id = cache_key('scenarios', list(st.session_state.scenarios.items()))
+            try:
+                plan = schedule_portfolio_plan(portfolio_id, portfolio, roster_file.getvalue(), projects)
+            except (ValueError, KeyError) as exc:
+                st.error(f"⚠️ Could not schedule: {exc}")
+            else:
+                st.metric("Makespan (weeks)", format_number(plan['makespan_weeks']))
+                show_grid(plan['completion'], {'finish_week': 'number'}, key="schedule_completion")
+                show_grid(plan['utilization'], {'busy_hours': 'number', 'utilization': 'fraction'},
+                          key="schedule_utilization")
+else:
+    st.info("💡 Upload an estimates file or save scenarios to see portfolio rollups")
+
+st.markdown('</div></div>', unsafe_allow_html=True)
+
+# ============ SECTION 7: RISK SIMULATION ============
+if len(selected_studies) > 0:
+    st.markdown('<div class="section-title"><span class="section-icon">🎲</span> Risk Simulation</div>', unsafe_allow_html=True)
+    st.markdown('<div class="card-premium"><div class="card-content">', unsafe_allow_html=True)
+    pool = get_worker_pool()
+    if not pool.ready():
+        st.caption("⏳ Worker processes are starting...")
+    
+    st.markdown("**Monte Carlo** — bus counts and study hours drawn from triangular ranges around the inputs")
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        mc_samples = st.select_slider("Samples", [10_000, 100_000, 500_000, 1_000_000, 5_000_000], value=100_000)
+    with col2:
+        mc_seed = st.number_input("Seed", min_value=0, value=0, step=1)
+    # Hashed now: the study and team dicts inside cache_inputs are edited in place by later runs
+    mc_key = cache_key('mc_job', [cache_inputs, mc_samples, mc_seed])
+    with col3:
+        if st.button("▶ Run Simulation", use_container_width=True):
+            st.session_state.mc_job = {'key': mc_key, 'job': monte_carlo_job(pool, current_inputs, mc_samples, mc_seed)}
+    
+    def render_monte_carlo(partials):
+        grand_totals = combine_chunks(partials)['grand_total']
+        columns = st.columns(3)
+        for column, (point, value) in zip(columns, percentiles(grand_totals).items()):
+            with column:
+                st.metric(f"P{point} Grand Total", format_currency(value))
+        st.bar_chart(histogram(grand_totals))
+    
+    follow_job('mc_job', mc_key, render_monte_carlo)
+    
+    st.markdown("**Parameter Sweep** — Grand Total as one input varies, everything else held")
+    col1, col2, col3, col4, col5 = st.columns([2, 1, 1, 1, 1])
+    with col1:
+        sweep_field = st.selectbox("Input", SWEEP_FIELDS)
+    with col2:
+        sweep_low = st.number_input("From", value=float(current_inputs[sweep_field]) * 0.5)
+    with col3:
+        sweep_high = st.number_input("To", value=float(current_inputs[sweep_field]) * 2)
+    with col4:
+        sweep_steps = st.number_input("Steps", min_value=2, max_value=100_000, value=1000, step=100)
+    sweep_key = cache_key('sweep_job', [cache_inputs, sweep_field, sweep_low, sweep_high, sweep_steps])
+    with col5:
+        if st.button("▶ Run Sweep", use_container_width=True):
+            sweep_values = np.linspace(sweep_low, sweep_high, int(sweep_steps))
+            st.session_state.sweep_job = {'key': sweep_key, 'values': sweep_values,
+                                          'job': sweep_job(pool, current_inputs, sweep_field, sweep_values)}
+    
+    def render_sweep(partials):
+        # Chunks finish out of order; each covers a fixed slice of the swept values
+        values = st.session_state.sweep_job['values']
+        curve = pd.concat([pd.Series(chunk['grand_total'], index=values[index * SWEEP_CHUNK:(index + 1) * SWEEP_CHUNK])
+                           for index, chunk in partials.items()])
+        st.line_chart(curve.sort_index().rename('grand_total'))
+    
+    follow_job('sweep_job', sweep_key, render_sweep)
+    st.markdown('</div></div>', unsafe_allow_html=True)
+
+# ============ SHARED CACHE STATISTICS ============
+with st.expander("▼ Shared Cache Statistics"):
+    cache_stats = SHARED_CACHE.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Entries in Memory", f"{cache_stats['entries']:,}")
+    with col2:
+        st.metric("Memory Used", f"{cache_stats['bytes'] / 2 ** 20:,.1f} MB")
+    with col3:
+        st.metric("Entries on Disk", f"{cache_stats['disk_entries']:,}")
+    with col4:
+        st.button("🗑️ Clear Cache", on_click=SHARED_CACHE.clear, use_container_width=True)
+    if cache_stats['namespaces']:
+        counts = pd.DataFrame(cache_stats['namespaces']).T
+        show_grid(counts, {'hits': 'count', 'disk_hits': 'count', 'misses': 'count', 'evictions': 'count',
+                           'expirations': 'count', 'hit_rate': 'fraction'}, key="cache_stats")
+
 # ============ FOOTER ============
 st.markdown("""
 <div class="footer-premium">
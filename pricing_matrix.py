@@ -0,0 +1,100 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from estimator_engine import REGION_FACTORS, MEETINGS_COUNT, MEETINGS_HRS, MODELLING_PERCENT, MODELLING_RATE
+from batch_engine import pack_inputs, compute_factors, aggregate_batch
+from portfolio import pack_frame, input_columns, CATEGORY_FIELDS
+
+# ============ FX TABLE ============
+# Rates live in fx_rates.json as INR per unit of each currency, one entry per
+# published version. Exports carry the version they were converted with.
+FX_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fx_rates.json')
+
+REGIONS = list(REGION_FACTORS.keys())
+REGION_VALUES = np.array([REGION_FACTORS[region] for region in REGIONS])
+
+def fx_versions(path=FX_TABLE_PATH):
+    with open(path, encoding='utf-8') as f:
+        table = json.load(f)
+    return sorted((entry['version'] for entry in table['versions']), reverse=True)
+
+def load_fx_table(version=None, path=FX_TABLE_PATH):
+    with open(path, encoding='utf-8') as f:
+        table = json.load(f)
+    versions = {entry['version']: entry for entry in table['versions']}
+    if version is None:
+        version = max(versions, key=lambda name: versions[name]['as_of'])
+    if version not in versions:
+        raise ValueError(f"Unknown FX table version {version!r} (available: {', '.join(sorted(versions))})")
+    entry = versions[version]
+    currencies = list(entry['inr_per_unit'].keys())
+    return {
+        'version': version,
+        'as_of': entry['as_of'],
+        'currencies': currencies,
+        'inr_per_unit': np.array([entry['inr_per_unit'][code] for code in currencies], dtype=float),
+        'formats': {code: table['currencies'][code] for code in currencies},
+        'region_currency': table['region_currency']
+    }
+
+def format_money(amount, currency, fx):
+    spec = fx['formats'][currency]
+    return f"{spec['symbol']}{amount:,.{spec['decimals']}f}"
+
+# ============ REGION x CURRENCY MATRIX ============
+# Region only scales study hours, so every cost term is either proportional to
+# the region factor (studies, %-based reporting, modelling on those hours) or
+# independent of it (fixed reporting, meetings, modelling on meeting hours).
+# Both parts are computed once at factor 1.0 and every region is an outer product.
+def region_terms(packed):
+    unit = dict(packed, region_factor=np.ones(len(packed['facility_mw'])))
+    batch = aggregate_batch(unit, compute_factors(unit))
+    modelling_per_hour = MODELLING_PERCENT * MODELLING_RATE
+    percent_mode = packed['percent_mode']
+    
+    scaled = (batch['total_study_cost'] + np.where(percent_mode, batch['total_reporting_cost'], 0.0) +
+              (batch['total_study_hours'] + batch['total_report_hours']) * modelling_per_hour)
+    fixed = (np.where(percent_mode, 0.0, batch['total_reporting_cost']) + batch['meetings_cost'] +
+             MEETINGS_COUNT * MEETINGS_HRS * modelling_per_hour)
+    return scaled, fixed, batch['total_buses']
+
+def price_matrix(packed, fx, regions=None, currencies=None):
+    regions = regions or REGIONS
+    currencies = currencies or fx['currencies']
+    region_values = REGION_VALUES[[REGIONS.index(region) for region in regions]]
+    inr_per_unit = fx['inr_per_unit'][[fx['currencies'].index(code) for code in currencies]]
+    
+    scaled, fixed, total_buses = region_terms(packed)
+    markup = 1 + packed['buffer_percent'] / 100
+    grand_total = (scaled[:, None] * region_values + fixed[:, None]) * markup[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cost_per_bus = np.where(total_buses[:, None] > 0, grand_total / total_buses[:, None], 0.0)
+    
+    # Shape (estimates, regions, currencies)
+    return {
+        'grand_total': grand_total[:, :, None] / inr_per_unit,
+        'cost_per_bus': cost_per_bus[:, :, None] / inr_per_unit,
+        'regions': regions,
+        'currencies': currencies,
+        'fx_version': fx['version']
+    }
+
+def estimate_price_matrix(inputs, fx):
+    matrix = price_matrix(pack_inputs([inputs]), fx)
+    index = pd.Index(matrix['regions'], name='Region')
+    return {key: pd.DataFrame(matrix[key][0], index=index, columns=matrix['currencies'])
+            for key in ('grand_total', 'cost_per_bus')}
+
+def portfolio_price_matrix(frame, fx, regions=None, currencies=None, metrics=('grand_total', 'cost_per_bus')):
+    matrix = price_matrix(pack_frame(frame), fx, regions, currencies)
+    label_columns = [c for c in frame.columns if c not in set(input_columns())]
+    results = {c: frame[c] for c in label_columns + CATEGORY_FIELDS[:3] if c in frame}
+    for metric in metrics:
+        for r, region in enumerate(matrix['regions']):
+            for c, currency in enumerate(matrix['currencies']):
+                results[f"{metric}_{region}_{currency}"] = matrix[metric][:, r, c]
+    results['fx_version'] = matrix['fx_version']
+    return pd.DataFrame(results, index=frame.index)
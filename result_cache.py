@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from estimator_engine import (PROJECT_FACTORS, VOLTAGE_FACTORS, REGION_FACTORS, STUDY_CATALOG, TEAM_LEVELS,
+                              MEETINGS_COUNT, MEETINGS_HRS, MEETINGS_RATE, MODELLING_PERCENT, MODELLING_RATE)
+
+# ============ SHARED RESULT CACHE ============
+# One cache per server process, shared by every session. Values are stored
+# pickled, so a hit hands each caller its own copy and no session can mutate
+# another's result. Memory is bounded by pickled bytes with LRU eviction;
+# entries expire after ttl_seconds. With a path, entries are written through
+# to SQLite and survive restarts. A memory miss that hits disk is promoted.
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_DISK_ENTRIES = 100_000
+PRUNE_EVERY = 256  # disk writes between size checks
+
+# Keys include a fingerprint of everything the model reads besides its inputs,
+# so editing the catalog or a factor table invalidates old entries
+CACHE_SCHEMA = 1
+ENGINE_FINGERPRINT = hashlib.sha256(json.dumps(
+    [CACHE_SCHEMA, PROJECT_FACTORS, VOLTAGE_FACTORS, REGION_FACTORS, STUDY_CATALOG,
+     MEETINGS_COUNT, MEETINGS_HRS, MEETINGS_RATE, MODELLING_PERCENT, MODELLING_RATE],
+    sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def canonical_inputs(inputs):
+    # Unselected studies' hours never reach the result, so they are left out of the key
+    selected = inputs['selected_studies']
+    return dict(inputs, custom_studies={code: inputs['custom_studies'][code] for code in selected
+                                        if code in inputs['custom_studies']},
+                custom_team={level: inputs['custom_team'][level] for level in TEAM_LEVELS})
+
+def cache_key(namespace, key):
+    payload = json.dumps([ENGINE_FINGERPRINT, namespace, key], sort_keys=True, default=str)
+    return namespace + ':' + hashlib.sha256(payload.encode()).hexdigest()
+
+class SharedCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl_seconds=DEFAULT_TTL_SECONDS, path=None,
+                 max_disk_entries=DEFAULT_MAX_DISK_ENTRIES):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()  # key -> (expires_at, blob)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._writes = 0
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS entries "
+                             "(key TEXT PRIMARY KEY, expires REAL, used REAL, value BLOB)")
+            self._db.execute("DELETE FROM entries WHERE expires < ?", (time.time(),))
+            self._db.commit()
+    
+    def _count(self, namespace, event):
+        counts = self._counts.setdefault(namespace, {'hits': 0, 'disk_hits': 0, 'misses': 0,
+                                                     'evictions': 0, 'expirations': 0})
+        counts[event] += 1
+    
+    def _store(self, key, expires, blob):
+        if key in self._entries:
+            self._bytes -= len(self._entries.pop(key)[1])
+        if len(blob) > self.max_bytes:
+            return
+        self._entries[key] = (expires, blob)
+        self._bytes += len(blob)
+        while self._bytes > self.max_bytes:
+            old_key, (_, old_blob) = self._entries.popitem(last=False)
+            self._bytes -= len(old_blob)
+            self._count(old_key.split(':', 1)[0], 'evictions')
+    
+    def _load(self, key, now):
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] >= now:
+                self._entries.move_to_end(key)
+                return entry[1], 'hits'
+            self._bytes -= len(self._entries.pop(key)[1])
+            self._count(key.split(':', 1)[0], 'expirations')
+        if self._db is not None:
+            row = self._db.execute("SELECT expires, value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[0] >= now:
+                self._db.execute("UPDATE entries SET used = ? WHERE key = ?", (now, key))
+                self._db.commit()
+                self._store(key, row[0], row[1])
+                return row[1], 'disk_hits'
+        return None, 'misses'
+    
+    def get(self, namespace, key, default=None):
+        full_key = cache_key(namespace, key)
+        with self._lock:
+            blob, event = self._load(full_key, time.time())
+            self._count(namespace, event)
+        return default if blob is None else pickle.loads(blob)
+    
+    def set(self, namespace, key, value):
+        full_key = cache_key(namespace, key)
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._lock:
+            self._store(full_key, now + self.ttl_seconds, blob)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                                 (full_key, now + self.ttl_seconds, now, blob))
+                self._writes += 1
+                if self._writes % PRUNE_EVERY == 0:
+                    self._prune_disk(now)
+                self._db.commit()
+    
+    def get_or_compute(self, namespace, key, compute):
+        # Two sessions missing on the same key at once both compute it; the
+        # results are identical, so the second write is harmless
+        full_key = cache_key(namespace, key)
+        with self._lock:
+            blob, event = self._load(full_key, time.time())
+            self._count(namespace, event)
+        if blob is not None:
+            return pickle.loads(blob)
+        value = compute()
+        self.set(namespace, key, value)
+        return value
+    
+    def _prune_disk(self, now):
+        self._db.execute("DELETE FROM entries WHERE expires < ?", (now,))
+        excess = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_disk_entries
+        if excess > 0:
+            self._db.execute("DELETE FROM entries WHERE key IN "
+                             "(SELECT key FROM entries ORDER BY used LIMIT ?)", (excess,))
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._counts = {}
+            if self._db is not None:
+                self._db.execute("DELETE FROM entries")
+                self._db.commit()
+    
+    def stats(self):
+        with self._lock:
+            namespaces = {namespace: dict(counts) for namespace, counts in self._counts.items()}
+            disk_entries = (self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+                            if self._db is not None else 0)
+            memory = {'entries': len(self._entries), 'bytes': self._bytes, 'disk_entries': disk_entries}
+        for counts in namespaces.values():
+            lookups = counts['hits'] + counts['disk_hits'] + counts['misses']
+            counts['hit_rate'] = (counts['hits'] + counts['disk_hits']) / lookups if lookups else 0.0
+        return {'namespaces': namespaces, **memory}
+
+# ============ PROCESS-WIDE INSTANCE ============
+# Created on first use and shared by every caller in the process. The
+# environment overrides the defaults: ESTIMATOR_CACHE_PATH (SQLite file, empty
+# for memory only), ESTIMATOR_CACHE_MB and ESTIMATOR_CACHE_TTL_HOURS.
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared_cache(default_path=None):
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = SharedCache(
+                max_bytes=int(float(os.environ.get('ESTIMATOR_CACHE_MB', DEFAULT_MAX_BYTES / 2 ** 20)) * 2 ** 20),
+                ttl_seconds=float(os.environ.get('ESTIMATOR_CACHE_TTL_HOURS', DEFAULT_TTL_SECONDS / 3600)) * 3600,
+                path=os.environ.get('ESTIMATOR_CACHE_PATH', default_path) or None)
+        return _shared
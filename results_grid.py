@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from estimator_engine import format_currency, format_number
+
+# ============ RESULTS GRID ============
+# Grids keep numeric columns so sorting stays numeric. Rows are sorted and
+# sliced server-side and display formatting is applied only to the visible
+# window, so only page_size rows are formatted and sent to the browser.
+DEFAULT_PAGE_SIZE = 50
+
+FORMATTERS = {
+    'currency': format_currency,
+    'number': format_number,
+    'percent': lambda value: f"{value:.1f}%",
+    'fraction': lambda value: f"{value:.1%}",
+    'signed': lambda value: f"{value:+.3f}",
+    'count': lambda value: f"{value:,.0f}"
+}
+
+def sort_rows(frame, column, ascending=True):
+    order = np.argsort(frame[column].to_numpy(), kind='stable')
+    return frame.iloc[order if ascending else order[::-1]]
+
+def page_window(frame, page, page_size=DEFAULT_PAGE_SIZE):
+    start = (page - 1) * page_size
+    return frame.iloc[start:start + page_size]
+
+def page_count(frame, page_size=DEFAULT_PAGE_SIZE):
+    return max(-(-len(frame) // page_size), 1)
+
+def formatter(kind):
+    # Named formatter, or any callable (e.g. a currency-specific one)
+    return kind if callable(kind) else FORMATTERS[kind]
+
+def styled(frame, formats, row_formats=None):
+    columns = [column for column in formats if column in frame]
+    styler = frame.style.format({column: formatter(formats[column]) for column in columns})
+    for row, kind in (row_formats or {}).items():
+        if row in frame.index:
+            styler = styler.format(formatter(kind), subset=pd.IndexSlice[[row], columns])
+    return styler
+
+def show_grid(frame, formats, key, row_formats=None, page_size=DEFAULT_PAGE_SIZE):
+    if len(frame) > page_size:
+        pages = page_count(frame, page_size)
+        col_sort, col_order, col_page = st.columns([2, 1, 1])
+        with col_sort:
+            sort_column = st.selectbox("Sort By", ["(none)"] + list(frame.columns), key=f"{key}_sort")
+        with col_order:
+            descending = st.toggle("Descending", key=f"{key}_desc")
+        with col_page:
+            page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1,
+                                   key=f"{key}_page_{pages}")
+        if sort_column != "(none)":
+            frame = sort_rows(frame, sort_column, ascending=not descending)
+        st.caption(f"Rows {(page - 1) * page_size + 1:,}–{min(page * page_size, len(frame)):,} of {len(frame):,}")
+        frame = page_window(frame, page, page_size)
+    st.dataframe(styled(frame, formats, row_formats), use_container_width=True)
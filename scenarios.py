@@ -0,0 +1,43 @@
+import copy
+
+import pandas as pd
+
+from estimator_engine import COST_COMPONENTS, DEFAULT_STUDIES, STUDY_CODES
+from batch_engine import calculate_batch
+
+# ============ SCENARIO WORKSPACE ============
+# A workspace is a plain dict of scenario name -> calculateAll inputs, so it can
+# live directly in st.session_state. All scenarios are evaluated in one batch.
+SUMMARY_ROWS = dict(COST_COMPONENTS, cost_per_bus='Cost/Bus', total_project_hours='Total Hours')
+
+def add_scenario(workspace, name, inputs):
+    workspace[name] = copy.deepcopy(inputs)
+    return workspace
+
+def evaluate_scenarios(workspace):
+    names = list(workspace.keys())
+    if not names:
+        return names, None
+    return names, calculate_batch([workspace[name] for name in names])
+
+def _with_deltas(values, names):
+    table = pd.DataFrame(values, columns=names)
+    baseline = names[0]
+    for name in names[1:]:
+        table[f"Δ {name}"] = table[name] - table[baseline]
+    return table
+
+def component_delta_table(names, batch):
+    values = {names[i]: [batch[key][i] for key in SUMMARY_ROWS] for i in range(len(names))}
+    table = _with_deltas(values, names)
+    table.insert(0, 'Component', list(SUMMARY_ROWS.values()))
+    return table
+
+def study_delta_table(names, batch):
+    study_total = batch['study_cost'] + batch['report_cost']
+    # Only studies selected in at least one scenario are shown
+    shown = [j for j in range(len(STUDY_CODES)) if batch['study_hrs'][:, j].any()]
+    values = {names[i]: study_total[i, shown] for i in range(len(names))}
+    table = _with_deltas(values, names)
+    table.insert(0, 'Study', [DEFAULT_STUDIES[STUDY_CODES[j]]['name'] for j in shown])
+    return table
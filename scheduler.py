@@ -0,0 +1,154 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from estimator_engine import DEFAULT_STUDIES, STUDY_CODES, TEAM_LEVELS
+from staffing import STUDY_SCHEDULE, topological_order, portfolio_hours, start_weeks
+
+# ============ ROSTER ============
+DEFAULT_HOURS_PER_WEEK = 40
+
+def load_roster(source):
+    roster = pd.read_csv(source)
+    roster.columns = [name.strip().lower() for name in roster.columns]
+    return roster
+
+def _roster_records(roster, origin):
+    records = []
+    for i, row in enumerate(pd.DataFrame(roster).to_dict('records')):
+        available_from = row.get('available_from')
+        if available_from is None or pd.isna(available_from):
+            start = 0.0
+        else:
+            start = max((pd.Timestamp(available_from) - origin).days / 7, 0.0)
+        records.append({
+            'name': row.get('name', f"{row['level']}-{i + 1}"),
+            'level': row['level'],
+            'hours_per_week': float(row.get('hours_per_week', DEFAULT_HOURS_PER_WEEK)),
+            'available_from': start,
+            'busy_hours': 0.0
+        })
+    return records
+
+# ============ TASK GRAPH ============
+def _selected_predecessors(selected, schedule):
+    # Predecessors among selected studies only, passing through unselected ones
+    preds = {}
+    for code in topological_order(schedule):
+        preds[code] = set()
+        for before in schedule[code]['after']:
+            preds[code] |= {before} if selected[before] else preds[before]
+    return {code: sorted(preds[code]) for code in STUDY_CODES if selected[code]}
+
+def _build_studies(study_hours, allocation, start_week, priority, schedule):
+    studies = []
+    for p in range(len(study_hours)):
+        selected = {code: study_hours[p, j] > 0 for j, code in enumerate(STUDY_CODES)}
+        preds = _selected_predecessors(selected, schedule)
+        ids = {code: len(studies) + i for i, code in enumerate(preds)}
+        for code, before in preds.items():
+            j = STUDY_CODES.index(code)
+            studies.append({
+                'project': p, 'code': code, 'ready': float(start_week[p]), 'priority': priority[p],
+                'waiting': len(before), 'successors': [],
+                'parts': [(level, study_hours[p, j] * allocation[p, k])
+                          for k, level in enumerate(TEAM_LEVELS) if allocation[p, k] > 0],
+                'remaining': 0, 'finish': float(start_week[p])
+            })
+        for code, before in preds.items():
+            for b in before:
+                studies[ids[b]]['successors'].append(ids[code])
+    return studies
+
+# ============ LIST SCHEDULING ============
+def schedule_tasks(study_hours, allocation, start_week, roster, priority=None, origin=None, schedule=STUDY_SCHEDULE):
+    origin = pd.Timestamp(origin) if origin is not None else pd.Timestamp.today().normalize()
+    priority = np.arange(len(study_hours)) if priority is None else np.asarray(priority)
+    engineers = _roster_records(roster, origin)
+    studies = _build_studies(study_hours, allocation, start_week, priority, schedule)
+    
+    missing = {level for s in studies for level, _ in s['parts']} - {e['level'] for e in engineers}
+    if missing:
+        raise ValueError(f"Roster has no engineers for level(s): {', '.join(sorted(missing))}")
+    
+    # Events are (time, order, kind, payload); ready queues are per level
+    events = [(e['available_from'], 0, 'free', i) for i, e in enumerate(engineers)]
+    events += [(s['ready'], 1, 'ready', i) for i, s in enumerate(studies) if s['waiting'] == 0]
+    heapq.heapify(events)
+    ready = {level: [] for level in TEAM_LEVELS}
+    idle = {level: [] for level in TEAM_LEVELS}
+    assignments = []
+    
+    while events:
+        now = events[0][0]
+        while events and events[0][0] == now:
+            _, _, kind, payload = heapq.heappop(events)
+            if kind == 'free':
+                heapq.heappush(idle[engineers[payload]['level']], payload)
+            elif kind == 'ready':
+                study = studies[payload]
+                study['remaining'] = len(study['parts'])
+                for level, hours in study['parts']:
+                    heapq.heappush(ready[level], (study['priority'], study['project'], payload, level, hours))
+            else:
+                engineer, sid = payload
+                heapq.heappush(idle[engineers[engineer]['level']], engineer)
+                study = studies[sid]
+                study['remaining'] -= 1
+                study['finish'] = max(study['finish'], now)
+                if study['remaining'] == 0:
+                    for nxt in study['successors']:
+                        studies[nxt]['waiting'] -= 1
+                        if studies[nxt]['waiting'] == 0:
+                            heapq.heappush(events, (now, 1, 'ready', nxt))
+        
+        # Dispatch highest-priority ready work to idle engineers of the same level
+        for level in TEAM_LEVELS:
+            while ready[level] and idle[level]:
+                _, project, sid, _, hours = heapq.heappop(ready[level])
+                engineer = heapq.heappop(idle[level])
+                finish = now + hours / engineers[engineer]['hours_per_week']
+                engineers[engineer]['busy_hours'] += hours
+                assignments.append({'project': project, 'study': DEFAULT_STUDIES[studies[sid]['code']]['name'],
+                                    'level': level, 'engineer': engineers[engineer]['name'],
+                                    'start_week': now, 'finish_week': finish, 'hours': hours})
+                heapq.heappush(events, (finish, 2, 'done', (engineer, sid)))
+    
+    return _summarize(assignments, studies, engineers, len(study_hours), origin)
+
+def _summarize(assignments, studies, engineers, n_projects, origin):
+    tasks = pd.DataFrame(assignments, columns=['project', 'study', 'level', 'engineer',
+                                               'start_week', 'finish_week', 'hours'])
+    finish = np.zeros(n_projects)
+    for study in studies:
+        finish[study['project']] = max(finish[study['project']], study['finish'])
+    completion = pd.DataFrame({
+        'finish_week': finish,
+        'completion_date': origin + pd.to_timedelta(np.ceil(finish * 7), unit='D')
+    })
+    makespan = finish.max() if n_projects else 0.0
+    utilization = pd.DataFrame([{
+        'engineer': e['name'], 'level': e['level'], 'busy_hours': e['busy_hours'],
+        'utilization': (e['busy_hours'] / (e['hours_per_week'] * (makespan - e['available_from']))
+                        if makespan > e['available_from'] else 0.0)
+    } for e in engineers])
+    return {'tasks': tasks, 'completion': completion, 'utilization': utilization, 'makespan_weeks': makespan}
+
+# Only awarded work takes engineers; open bids are left out of the schedule
+AWARDED_STATUSES = ('awarded', 'won', 'confirmed')
+
+def awarded_projects(results, status_column='status'):
+    # Index of the awarded estimates, or None when the portfolio has no status column
+    if status_column not in results:
+        return None
+    status = results[status_column].astype(str).str.strip().str.lower()
+    return results.index[status.isin(AWARDED_STATUSES).to_numpy()]
+
+def schedule_portfolio(results, roster, start_column='start_date', origin=None, schedule=STUDY_SCHEDULE):
+    study_hours, allocation = portfolio_hours(results)
+    origin, start_week = start_weeks(results, start_column, origin)
+    priority = results['priority'].to_numpy() if 'priority' in results else None
+    scheduled = schedule_tasks(study_hours, allocation, start_week, roster, priority, origin, schedule)
+    scheduled['completion'].index = results.index
+    return scheduled
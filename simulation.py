@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from batch_engine import compute_factors, aggregate_batch
+from portfolio import SCALAR_FIELDS
+
+# ============ MONTE CARLO ============
+# Triangular multipliers (low, mode, high) on the inputs least known at bid
+# time. Hours skew high: studies overrun more often than they finish early.
+UNCERTAINTY = {'buses': (0.8, 1.0, 1.25), 'base_hrs': (0.85, 1.0, 1.3)}
+OUTPUTS = ('grand_total', 'cost_per_bus', 'total_project_hours')
+SWEEP_FIELDS = SCALAR_FIELDS
+
+def repeat_packed(packed, n):
+    # Packed inputs of a single estimate, repeated to n rows
+    return {key: np.repeat(value, n, axis=0) for key, value in packed.items()}
+
+def monte_carlo_chunk(packed, n, seed, uncertainty=UNCERTAINTY):
+    rng = np.random.default_rng(seed)
+    samples = repeat_packed(packed, n)
+    low, mode, high = uncertainty['buses']
+    for field in ('mv_buses', 'lv_buses'):
+        # Bus counts stay whole and a non-empty voltage level keeps at least one bus
+        scaled = np.rint(samples[field] * rng.triangular(low, mode, high, n))
+        samples[field] = np.maximum(scaled, np.minimum(samples[field], 1))
+    low, mode, high = uncertainty['base_hrs']
+    samples['base_hrs'] = samples['base_hrs'] * rng.triangular(low, mode, high, samples['base_hrs'].shape)
+    batch = aggregate_batch(samples, compute_factors(samples))
+    return {key: batch[key] for key in OUTPUTS}
+
+def sweep_chunk(packed, field, values):
+    rows = repeat_packed(packed, len(values))
+    rows[field] = np.asarray(values, dtype=float)
+    batch = aggregate_batch(rows, compute_factors(rows))
+    return {key: batch[key] for key in OUTPUTS}
+
+# ============ COMBINING CHUNKS ============
+# Chunks arrive out of order; partial results are keyed by chunk index
+def combine_chunks(partials):
+    ordered = [partials[index] for index in sorted(partials)]
+    return {key: np.concatenate([chunk[key] for chunk in ordered]) for key in OUTPUTS}
+
+def percentiles(values, points=(10, 50, 90)):
+    return dict(zip(points, np.percentile(values, points))) if len(values) else {}
+
+def histogram(values, bins=30):
+    counts, edges = np.histogram(values, bins=bins)
+    return pd.Series(counts, index=np.round((edges[:-1] + edges[1:]) / 2, -3))
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from estimator_engine import STUDY_CATALOG, STUDY_CODES, TEAM_LEVELS
+
+# ============ STUDY SEQUENCING ============
+# Default duration (weeks) and predecessors per study, from the catalog. A
+# study starts when all selected predecessors finish; unselected studies take
+# zero time, so chains pass straight through them (e.g. af after sc when pdc
+# is not selected).
+DEFAULT_STUDY_WEEKS = 2
+STUDY_SCHEDULE = {code: {'weeks': entry.get('weeks', DEFAULT_STUDY_WEEKS), 'after': entry.get('after', [])}
+                  for code, entry in STUDY_CATALOG.items()}
+
+def topological_order(schedule):
+    order, seen = [], set()
+    def visit(code):
+        if code not in seen:
+            seen.add(code)
+            for before in schedule[code]['after']:
+                visit(before)
+            order.append(code)
+    for code in schedule:
+        visit(code)
+    return order
+
+def study_windows(study_hours, start_week, schedule=STUDY_SCHEDULE):
+    index = {code: j for j, code in enumerate(STUDY_CODES)}
+    active = study_hours > 0
+    weeks = np.array([schedule[code]['weeks'] for code in STUDY_CODES])
+    start = np.zeros(study_hours.shape, dtype=np.int64)
+    finish = np.zeros(study_hours.shape, dtype=np.int64)
+    # One vectorized step per study across all projects
+    for code in topological_order(schedule):
+        j = index[code]
+        ready = np.asarray(start_week, dtype=np.int64)
+        for before in schedule[code]['after']:
+            ready = np.maximum(ready, finish[:, index[before]])
+        start[:, j] = ready
+        finish[:, j] = ready + weeks[j] * active[:, j]
+    return start, finish
+
+# ============ WEEKLY DEMAND CURVES ============
+def weekly_demand(study_hours, allocation, start_week, schedule=STUDY_SCHEDULE):
+    start, finish = study_windows(study_hours, start_week, schedule)
+    duration = finish - start
+    weekly_hours = np.divide(study_hours, duration, out=np.zeros(study_hours.shape), where=duration > 0)
+    horizon = max(int(finish.max()) if finish.size else 0, 1)
+    
+    # Difference array per level: +rate at start week, -rate at finish week, then cumsum
+    demand = np.zeros((horizon + 1, len(TEAM_LEVELS)))
+    start, finish = start.ravel(), finish.ravel()
+    for k in range(len(TEAM_LEVELS)):
+        level_rate = (weekly_hours * allocation[:, k:k + 1]).ravel()
+        demand[:, k] = (np.bincount(start, weights=level_rate, minlength=horizon + 1) -
+                        np.bincount(finish, weights=level_rate, minlength=horizon + 1))
+    return pd.DataFrame(np.cumsum(demand, axis=0)[:horizon], columns=TEAM_LEVELS)
+
+def portfolio_hours(results):
+    study_hours = results[['hours_' + code for code in STUDY_CODES]].to_numpy()
+    total = results['total_study_hours'].to_numpy()[:, None]
+    level_hours = results[[level + '_hours' for level in TEAM_LEVELS]].to_numpy()
+    allocation = np.divide(level_hours, total, out=np.zeros(level_hours.shape), where=total > 0)
+    return study_hours, allocation
+
+def start_weeks(results, start_column='start_date', origin=None):
+    if start_column in results:
+        starts = pd.to_datetime(results[start_column])
+        origin = pd.Timestamp(origin) if origin is not None else starts.min()
+        return origin, ((starts - origin).dt.days // 7).clip(lower=0).to_numpy()
+    origin = pd.Timestamp(origin) if origin is not None else pd.Timestamp.today().normalize()
+    return origin, np.zeros(len(results), dtype=np.int64)
+
+def portfolio_staffing(results, start_column='start_date', origin=None, schedule=STUDY_SCHEDULE):
+    study_hours, allocation = portfolio_hours(results)
+    origin, start_week = start_weeks(results, start_column, origin)
+    demand = weekly_demand(study_hours, allocation, start_week, schedule)
+    demand.index = pd.date_range(origin, periods=len(demand), freq='7D', name='week')
+    return demand
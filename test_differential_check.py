@@ -0,0 +1,6 @@
+from differential_check import run
+
+# Every fast path must reproduce calculateAll on random inputs within the form bounds
+def test_fast_paths_match_calculate_all():
+    lines = []
+    assert run(20_000, 2_000, out=lines.append), "\n".join(lines)
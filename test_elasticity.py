@@ -0,0 +1,36 @@
+import numpy as np
+
+from estimator_engine import STUDY_INDEX, TEAM_LEVELS
+from batch_engine import pack_inputs, compute_factors, aggregate_batch
+from differential_check import random_frame, frame_to_inputs
+from elasticity import jacobian
+
+PACKED_NAMES = {'baseHrs': 'base_hrs'}  # Jacobian column prefix -> packed field
+
+def _outputs(packed, output):
+    return aggregate_batch(packed, compute_factors(packed))[output]
+
+# Each closed-form partial must match a central difference of the batch engine
+def test_jacobian_matches_finite_differences():
+    packed = pack_inputs(list(frame_to_inputs(random_frame(200, seed=7))))
+    for output, grad in jacobian(packed).items():
+        value = _outputs(packed, output)
+        for column in grad.columns:
+            name, _, index = column.rstrip(']').partition('[')
+            field = PACKED_NAMES.get(name, name)
+            j = (STUDY_INDEX[index] if index in STUDY_INDEX else TEAM_LEVELS.index(index)) if index else None
+            x = packed[field] if j is None else packed[field][:, j]
+            h = 1e-6 * np.maximum(np.abs(x), 1)
+            shifted = []
+            for sign in (1, -1):
+                step = {key: array.copy() for key, array in packed.items()}
+                if j is None:
+                    step[field] += sign * h
+                else:
+                    step[field][:, j] += sign * h
+                shifted.append(_outputs(step, output))
+            finite_difference = (shifted[0] - shifted[1]) / (2 * h)
+            # Tolerance on the elasticity scale: output change per relative change in x
+            tolerance = 1e-6 * np.abs(value) / np.maximum(np.abs(x), 1)
+            error = np.abs(grad[column].to_numpy() - finite_difference)
+            assert np.all(error <= 1e-5 * np.abs(finite_difference) + tolerance), f"d {output} / d {column}"
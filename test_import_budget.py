@@ -0,0 +1,10 @@
+from estimate_cli import HEAVY_MODULES, IMPORT_BUDGET_MS, measure_import_ms
+
+# The CLI must start without the tabular stack; see estimate_cli check-imports
+def test_cli_import_stays_within_budget():
+    elapsed_ms, _ = measure_import_ms()
+    assert elapsed_ms <= IMPORT_BUDGET_MS, f"import estimate_cli took {elapsed_ms:.1f} ms"
+
+def test_cli_import_loads_no_heavy_modules():
+    _, imported = measure_import_ms()
+    assert not imported & set(HEAVY_MODULES), sorted(imported & set(HEAVY_MODULES))
@@ -0,0 +1,48 @@
+import os
+
+from streamlit.testing.v1 import AppTest
+
+from estimator_engine import default_inputs
+from version_history import VersionHistory
+
+# Keep the app's shared cache in memory during tests
+os.environ.setdefault('ESTIMATOR_CACHE_PATH', '')
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'power_estimator_minimal.py')
+
+def _edited(inputs, **changes):
+    edited = dict(inputs, **changes)
+    edited['custom_team'] = {level: dict(team) for level, team in inputs['custom_team'].items()}
+    return edited
+
+def test_commit_undo_redo_round_trip():
+    history = VersionHistory()
+    first = default_inputs()
+    second = _edited(first, lv_buses=80)
+    second['custom_team']['L2']['allocation'] = 0.29
+    history.commit(first)
+    history.commit(second)
+    
+    assert history.undo() == first
+    assert history.can_redo()
+    assert history.redo() == second
+    assert not history.can_redo()
+    # Re-committing the restored inputs is not a new version
+    assert history.commit(second) == 2 and len(history) == 2
+
+def test_widget_restore_round_trip():
+    at = AppTest.from_file(APP, default_timeout=120).run()
+    at.slider(key="alloc_L2").set_value(29).run()
+    at.number_input(key="lv_buses").set_value(80).run()
+    versions = len(at.session_state.history)
+    
+    [button for button in at.button if 'Undo' in button.label][0].click().run()
+    assert at.slider(key="alloc_L2").value == 29
+    assert at.number_input(key="lv_buses").value != 80
+    assert len(at.session_state.history) == versions
+    assert at.session_state.history.can_redo()
+    
+    [button for button in at.button if 'Redo' in button.label][0].click().run()
+    assert at.slider(key="alloc_L2").value == 29
+    assert at.number_input(key="lv_buses").value == 80
+    assert not at.exception
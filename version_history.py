@@ -0,0 +1,247 @@
+from datetime import datetime
+
+# ============ PERSISTENT MAP ============
+# Hash array mapped trie with path copying: set() copies only the nodes on the
+# path to the changed key (at most 13 small tuples), every other node is
+# shared with the previous version. diff() skips shared subtrees by identity,
+# so comparing two versions costs O(changed keys), not O(size).
+_BITS = 5
+_WIDTH = 1 << _BITS
+_MASK = _WIDTH - 1
+_MAX_DEPTH = 64 // _BITS
+_EMPTY_NODE = (None,) * _WIDTH
+_MISSING = object()
+
+def _hash(key):
+    return hash(key) & ((1 << 64) - 1)
+
+class _Leaf:
+    __slots__ = ('key', 'value', 'hash')
+    
+    def __init__(self, key, value, key_hash):
+        self.key = key
+        self.value = value
+        self.hash = key_hash
+
+def _index(key_hash, depth):
+    return (key_hash >> (_BITS * depth)) & _MASK
+
+def _leaves(entry):
+    if entry is None:
+        return
+    if isinstance(entry, _Leaf):
+        yield entry
+    else:
+        for child in entry:
+            yield from _leaves(child)
+
+def _merge(a, b, depth):
+    # Two leaves collide in a slot: push them down until their hash bits differ
+    if depth >= _MAX_DEPTH:
+        return [a, b]
+    ia, ib = _index(a.hash, depth), _index(b.hash, depth)
+    node = list(_EMPTY_NODE)
+    if ia == ib:
+        node[ia] = _merge(a, b, depth + 1)
+    else:
+        node[ia], node[ib] = a, b
+    return tuple(node)
+
+def _set(node, depth, leaf):
+    if isinstance(node, list):
+        # Full-hash collision bucket at the bottom of the trie
+        kept = [item for item in node if item.key != leaf.key]
+        return kept + [leaf]
+    idx = _index(leaf.hash, depth)
+    entry = node[idx]
+    if entry is None:
+        new = leaf
+    elif isinstance(entry, _Leaf):
+        if entry.key == leaf.key:
+            if entry.value is leaf.value:
+                return node
+            new = leaf
+        else:
+            new = _merge(entry, leaf, depth + 1)
+    else:
+        new = _set(entry, depth + 1, leaf)
+        if new is entry:
+            return node
+    return node[:idx] + (new,) + node[idx + 1:]
+
+def _remove(node, depth, key, key_hash):
+    if isinstance(node, list):
+        kept = [item for item in node if item.key != key]
+        return node if len(kept) == len(node) else kept
+    idx = _index(key_hash, depth)
+    entry = node[idx]
+    if entry is None or (isinstance(entry, _Leaf) and entry.key != key):
+        return node
+    new = None if isinstance(entry, _Leaf) else _remove(entry, depth + 1, key, key_hash)
+    if new is entry:
+        return node
+    return node[:idx] + (new,) + node[idx + 1:]
+
+def _get(node, depth, key, key_hash):
+    while True:
+        if isinstance(node, list):
+            return next((item for item in node if item.key == key), None)
+        entry = node[_index(key_hash, depth)]
+        if entry is None or isinstance(entry, _Leaf):
+            return entry if entry is not None and entry.key == key else None
+        node, depth = entry, depth + 1
+
+def _diff(a, b, changes):
+    if a is b:
+        return
+    if isinstance(a, tuple) and isinstance(b, tuple) and len(a) == len(b) == _WIDTH:
+        for child_a, child_b in zip(a, b):
+            if child_a is not child_b:
+                _diff(child_a, child_b, changes)
+        return
+    before = {leaf.key: leaf.value for leaf in _leaves(a)}
+    after = {leaf.key: leaf.value for leaf in _leaves(b)}
+    for key in before.keys() | after.keys():
+        old, new = before.get(key, _MISSING), after.get(key, _MISSING)
+        if old is not new and old != new:
+            changes[key] = (old, new)
+
+class PersistentMap:
+    __slots__ = ('_root', '_size')
+    
+    def __init__(self, root=_EMPTY_NODE, size=0):
+        self._root = root
+        self._size = size
+    
+    def set(self, key, value):
+        key_hash = _hash(key)
+        existed = _get(self._root, 0, key, key_hash) is not None
+        root = _set(self._root, 0, _Leaf(key, value, key_hash))
+        if root is self._root:
+            return self
+        return PersistentMap(root, self._size + (0 if existed else 1))
+    
+    def remove(self, key):
+        root = _remove(self._root, 0, key, _hash(key))
+        if root is self._root:
+            return self
+        return PersistentMap(root, self._size - 1)
+    
+    def get(self, key, default=None):
+        leaf = _get(self._root, 0, key, _hash(key))
+        return default if leaf is None else leaf.value
+    
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+    
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+    
+    def __len__(self):
+        return self._size
+    
+    def __iter__(self):
+        return (leaf.key for leaf in _leaves(self._root))
+    
+    def items(self):
+        return ((leaf.key, leaf.value) for leaf in _leaves(self._root))
+    
+    def diff(self, other):
+        changes = {}
+        _diff(self._root, other._root, changes)
+        return changes
+
+# ============ FREEZE / THAW ============
+def freeze(value, previous=None):
+    # Unchanged values keep the previous version's objects, so nodes are shared
+    if isinstance(value, dict):
+        frozen = previous if isinstance(previous, PersistentMap) else PersistentMap()
+        for key, item in value.items():
+            old = frozen.get(key, _MISSING)
+            frozen = frozen.set(key, freeze(item, None if old is _MISSING else old))
+        for key in [key for key in frozen if key not in value]:
+            frozen = frozen.remove(key)
+        return frozen
+    if isinstance(value, (list, tuple)):
+        value = tuple(freeze(item) for item in value)
+    if previous is not None and previous == value:
+        return previous
+    return value
+
+def thaw(value):
+    if isinstance(value, PersistentMap):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+def flat_diff(a, b, prefix=''):
+    changes = {}
+    for key, (old, new) in a.diff(b).items():
+        path = f"{prefix}{key}"
+        if isinstance(old, PersistentMap) and isinstance(new, PersistentMap):
+            changes.update(flat_diff(old, new, path + '.'))
+        else:
+            changes[path] = (thaw(None if old is _MISSING else old), thaw(None if new is _MISSING else new))
+    return changes
+
+# ============ VERSION HISTORY ============
+# Linear undo/redo over frozen input snapshots. Committing after an undo drops
+# the redo branch, like an editor. Versions are numbered from 1.
+class VersionHistory:
+    def __init__(self, max_versions=500):
+        self.max_versions = max_versions
+        self._versions = []
+        self._cursor = -1
+    
+    def __len__(self):
+        return len(self._versions)
+    
+    @property
+    def current(self):
+        return self._cursor + 1
+    
+    def commit(self, inputs, label=None):
+        previous = self._versions[self._cursor]['snapshot'] if self._versions else None
+        snapshot = freeze(inputs, previous)
+        if snapshot is previous:
+            return self.current
+        del self._versions[self._cursor + 1:]
+        self._versions.append({'snapshot': snapshot, 'label': label, 'timestamp': datetime.now()})
+        if len(self._versions) > self.max_versions:
+            del self._versions[0]
+        self._cursor = len(self._versions) - 1
+        return self.current
+    
+    def can_undo(self):
+        return self._cursor > 0
+    
+    def can_redo(self):
+        return self._cursor < len(self._versions) - 1
+    
+    def undo(self):
+        if self.can_undo():
+            self._cursor -= 1
+        return self.restore(self.current)
+    
+    def redo(self):
+        if self.can_redo():
+            self._cursor += 1
+        return self.restore(self.current)
+    
+    def snapshot(self, version):
+        return self._versions[version - 1]['snapshot']
+    
+    def restore(self, version):
+        self._cursor = version - 1
+        return thaw(self.snapshot(version))
+    
+    def diff(self, version, other=None):
+        return flat_diff(self.snapshot(version), self.snapshot(other or self.current))
+    
+    def log(self):
+        return [{'version': i + 1, 'label': entry['label'], 'timestamp': entry['timestamp']}
+                for i, entry in enumerate(self._versions)]
@@ -0,0 +1,154 @@
+import importlib
+import os
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from batch_engine import pack_inputs
+from simulation import monte_carlo_chunk, sweep_chunk
+
+# ============ WARM WORKER POOL ============
+# Long-lived worker processes shared by every session. Each worker imports the
+# engine and loads the rate-card and FX tables once at start-up, so a job pays
+# only for its own chunks. A job is split into chunks queued on the pool;
+# results stream back per chunk as they finish, in any order. Cancelling drops
+# every chunk not yet started, so a superseded job stops within about one
+# chunk per worker. Jobs run first come, first served.
+MC_CHUNK = 25_000
+SWEEP_CHUNK = 200
+PORTFOLIO_CHUNK = 100_000
+
+def _warm_worker():
+    # Importing loads the study catalog, rate card and FX table; one small batch
+    # touches the numpy code paths a first job would otherwise pay for
+    from estimator_engine import default_inputs
+    from batch_engine import calculate_batch
+    for name in ('portfolio', 'pricing_matrix'):
+        importlib.import_module(name)
+    calculate_batch([default_inputs()])
+
+def _ping():
+    return os.getpid()
+
+def _portfolio_rollup_chunk(frame, by):
+    from portfolio import evaluate_portfolio, rollup
+    return rollup(evaluate_portfolio(frame, exact_money=True), by)
+
+TASKS = {
+    'monte_carlo': monte_carlo_chunk,
+    'sweep': sweep_chunk,
+    'portfolio_rollup': _portfolio_rollup_chunk
+}
+
+def _run_chunk(kind, args):
+    return TASKS[kind](*args)
+
+class Job:
+    def __init__(self, kind, chunk_count):
+        self.kind = kind
+        self.chunks = chunk_count
+        self.completed = {}
+        self.error = None
+        self.cancelled = False
+        self._futures = []
+        self._changed = threading.Condition()
+    
+    def _finished(self, index, future):
+        with self._changed:
+            if not future.cancelled():
+                if future.exception() is not None:
+                    self.error = future.exception()
+                else:
+                    self.completed[index] = future.result()
+            self._changed.notify_all()
+    
+    @property
+    def done(self):
+        return self.cancelled or self.error is not None or len(self.completed) == self.chunks
+    
+    def cancel(self):
+        with self._changed:
+            self.cancelled = True
+            for future in self._futures:
+                future.cancel()
+            self._changed.notify_all()
+    
+    def stream(self, timeout=None):
+        # Yields (chunk index, result) for every finished chunk, including ones
+        # that finished before this call, until the job completes or is cancelled
+        seen = set()
+        while True:
+            with self._changed:
+                fresh = [index for index in self.completed if index not in seen]
+                if not fresh and not self.done:
+                    if not self._changed.wait(timeout):
+                        return
+                    continue
+                results = [(index, self.completed[index]) for index in fresh]
+            for index, result in results:
+                seen.add(index)
+                yield index, result
+            if self.error is not None:
+                raise self.error
+            if self.done and len(seen) == len(self.completed):
+                return
+
+class WorkerPool:
+    def __init__(self, workers=None):
+        self.workers = workers or max((os.cpu_count() or 2) - 1, 1)
+        # spawn, not fork: the Streamlit server is multi-threaded
+        self._executor = ProcessPoolExecutor(self.workers, mp_context=get_context('spawn'),
+                                             initializer=_warm_worker)
+        # Workers start on demand; one ping each starts and warms them all now.
+        # Streamlit runs the page as __main__, which spawned workers would re-run
+        # on start-up, so they are started against an empty __main__ instead.
+        main = sys.modules['__main__']
+        sys.modules['__main__'] = types.ModuleType('__main__')
+        try:
+            self._warmup = [self._executor.submit(_ping) for _ in range(self.workers)]
+        finally:
+            sys.modules['__main__'] = main
+    
+    def ready(self):
+        return all(future.done() for future in self._warmup)
+    
+    def submit(self, kind, chunk_args):
+        job = Job(kind, len(chunk_args))
+        for index, args in enumerate(chunk_args):
+            future = self._executor.submit(_run_chunk, kind, args)
+            job._futures.append(future)
+            future.add_done_callback(lambda future, index=index: job._finished(index, future))
+        return job
+    
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+# ============ JOB BUILDERS ============
+def _spans(total, size):
+    return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+def monte_carlo_job(pool, inputs, samples, seed=0, chunk_size=MC_CHUNK):
+    # One seed per chunk, so results do not depend on which worker ran what
+    packed = pack_inputs([inputs])
+    spans = _spans(samples, chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(spans))
+    return pool.submit('monte_carlo', [(packed, end - start, chunk_seed)
+                                       for (start, end), chunk_seed in zip(spans, seeds)])
+
+def sweep_job(pool, inputs, field, values, chunk_size=SWEEP_CHUNK):
+    packed = pack_inputs([inputs])
+    values = np.asarray(values, dtype=float)
+    return pool.submit('sweep', [(packed, field, values[start:end]) for start, end in _spans(len(values), chunk_size)])
+
+def portfolio_rollup_job(pool, frame, by, chunk_rows=PORTFOLIO_CHUNK):
+    return pool.submit('portfolio_rollup', [(frame.iloc[start:end], by) for start, end in _spans(len(frame), chunk_rows)])
+
+def combine_rollups(partials):
+    # Rollups are sums, so partial rollups add up to the full one
+    frames = list(partials.values())
+    return pd.concat(frames).groupby(level=list(range(frames[0].index.nlevels))).sum()